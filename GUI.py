@@ -1,3 +1,5 @@
+import json
+import time
 import webbrowser
 from pathlib import Path
 
@@ -5,6 +7,8 @@ from pathlib import Path
 import tomlkit
 from flask import (
     Flask,
+    Response,
+    jsonify,
     redirect,
     render_template,
     request,
@@ -13,6 +17,8 @@ from flask import (
 )
 
 import utils.gui_utils as gui
+from utils.videos import export_json
+from video_creation.progress import read_status
 
 # Set the hostname
 HOST = "localhost"
@@ -85,10 +91,31 @@ def settings():
     return render_template("settings.html", file="config.toml", data=config, checks=checks)
 
 
-# Make videos.json accessible
+# Make videos.json accessible (exported from the done-video store)
 @app.route("/videos.json")
 def videos_json():
-    return send_from_directory("video_creation/data", "videos.json")
+    return jsonify(export_json())
+
+
+# Live render progress (written by the rendering process, see video_creation/progress.py)
+@app.route("/render/progress")
+def render_progress():
+    return jsonify(read_status())
+
+
+# Same as a Server-Sent-Events stream: new data whenever a render reports progress
+@app.route("/render/events")
+def render_events():
+    def stream():
+        last = None
+        while True:
+            status = read_status()
+            if status != last:
+                yield f"data: {json.dumps(status)}\n\n"
+                last = status
+            time.sleep(0.5)
+
+    return Response(stream(), mimetype="text/event-stream")
 
 
 # Make backgrounds.json accessible
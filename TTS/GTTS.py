@@ -8,6 +8,7 @@ from utils import settings
 class GTTS:
     def __init__(self):
         self.max_chars = 5000
+        self.max_concurrency = 4
         self.voices = []
 
     def run(self, text, filepath):
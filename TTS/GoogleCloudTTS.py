@@ -10,6 +10,7 @@ class GoogleCloudTTS:
 
     def __init__(self):
         self.max_chars = 5000
+        self.max_concurrency = 8
         self._client: texttospeech.TextToSpeechClient | None = None
         self._init_client()
 
@@ -10,6 +10,7 @@ class KokoroTTS:
         self.model        = settings.config["settings"]["tts"]["kokoro_model"]
         self.use_captioned = settings.config["settings"]["tts"].get("kokoro_captioned", False)
         self.max_chars    = 5000
+        self.max_concurrency = 4
 
     def run(self, text: str, filepath: str, random_voice: bool = False):
         if not self.api_key:
@@ -33,6 +33,7 @@ class SpeechifyTTS:
         self.language: str   = cfg.get("speechify_language_code", "")
         self.model: str      = cfg.get("speechify_model", "simba-english")
         self.max_chars: int  = 20_000            # soft-limit lt. Speechify docs
+        self.max_concurrency: int = 4
 
         self._base_url = "https://api.sws.speechify.com/v1"
 
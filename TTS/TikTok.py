@@ -88,6 +88,7 @@ class TikTok:
 
         self.URI_BASE = "https://api16-normal-c-useast1a.tiktokv.com/media/api/text/speech/invoke/"
         self.max_chars = 200
+        self.max_concurrency = 4
 
         self._session = requests.Session()
         # set the headers to the session, so we don't have to do it for every request
@@ -28,6 +28,7 @@ voices = [
 class AWSPolly:
     def __init__(self):
         self.max_chars = 3000
+        self.max_concurrency = 8
         self.voices = voices
 
     def run(self, text, filepath, random_voice: bool = False):
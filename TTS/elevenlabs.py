@@ -9,6 +9,7 @@ from utils import settings
 class elevenlabs:
     def __init__(self):
         self.max_chars = 2500
+        self.max_concurrency = 4
         self.client: ElevenLabs = None
 
     def run(self, text, filepath, random_voice: bool = False):
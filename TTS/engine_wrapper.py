@@ -1,16 +1,19 @@
 import os
 import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
-import numpy as np
+import ffmpeg
 import translators
-from moviepy.audio.AudioClip import AudioClip
-from moviepy.audio.fx.volumex import volumex
-from moviepy.editor import AudioFileClip
 from rich.progress import track
 
-from utils import settings
+from TTS.tts_cache import TTSCache
+from utils import metrics, settings
+from utils.audio_info import probe_audio
+from utils.clip_manifest import write_manifest
 from utils.console import print_step, print_substep
 from utils.voice import sanitize_text
 from utils.text_expander import expand_abbreviations  # Import new text expansion module
@@ -18,6 +21,12 @@ from utils.text_expander import expand_abbreviations  # Import new text expansio
 DEFAULT_MAX_LENGTH: int = (
     50  # Video length variable, edit this on your own risk. It should work, but it's not supported
 )
+DEFAULT_MAX_CONCURRENCY: int = 1  # for TTS modules that don't declare max_concurrency
+SILENCE_DIR = "assets/temp/silence"
+
+_SENTENCE = re.compile(r"[^.!?]*(?:[.!?]+|$)")  # no nested quantifiers: can't backtrack
+_silence_files: Dict[Tuple[float, int, int], str] = {}
+_silence_lock = threading.Lock()
 
 
 class TTSEngine:
@@ -32,6 +41,7 @@ class TTSEngine:
 
     Notes:
         tts_module must take the arguments text and filepath.
+        tts_module may set max_concurrency to the number of requests it can run in parallel.
     """
 
     def __init__(
@@ -51,6 +61,9 @@ class TTSEngine:
         self.max_length = max_length
         self.length = 0
         self.last_clip_length = last_clip_length
+        self.cache = TTSCache.from_config()
+        self.clips: List[Dict] = []  # manifest entries, in output order
+        self.span = metrics.Span(self.redditid, "tts")  # replaced by the recorded span in run()
 
     def add_periods(
         self,
@@ -70,113 +83,264 @@ class TTSEngine:
             comment["comment_body"] = re.sub(r'\."\.', '".', comment["comment_body"])
 
     def run(self) -> Tuple[int, int]:
-        """Processes the Reddit object and converts the text into MP3 files using the chosen TTS engine."""
-        Path(self.path).mkdir(parents=True, exist_ok=True)
-        print_step("Saving Text to MP3 files...")
+        """Processes the Reddit object and converts the text into MP3 files using the chosen TTS engine.
 
-        self.add_periods()
-        self.call_tts("title", process_text(self.reddit_object["thread_title"]))
-        # processed_text = ##self.reddit_object["thread_post"] != ""
-        idx = 0
+        Clips are synthesized by a bounded worker pool (see max_workers) but their
+        lengths are accumulated in output order, so the max_length cutoff behaves
+        exactly like the sequential loop did. The clips are listed with their
+        duration, format and text in assets/temp/<id>/manifest.json.
+        """
+        with metrics.span(self.redditid, "tts") as self.span:
+            Path(self.path).mkdir(parents=True, exist_ok=True)
+            print_step("Saving Text to MP3 files...")
 
-        if settings.config["settings"]["storymode"]:
-            if settings.config["settings"]["storymodemethod"] == 0:
-                if len(self.reddit_object["thread_post"]) > self.tts_module.max_chars:
-                    self.split_post(self.reddit_object["thread_post"], "postaudio")
-                else:
-                    self.call_tts("postaudio", process_text(self.reddit_object["thread_post"]))
-            elif settings.config["settings"]["storymodemethod"] == 1:
-                for idx, text in track(enumerate(self.reddit_object["thread_post"])):
-                    self.call_tts(f"postaudio-{idx}", process_text(text))
+            self.add_periods()
+            jobs: List[Callable[[], Tuple[Optional[Dict], List[Optional[float]]]]] = [
+                self._job("title", self.reddit_object["thread_title"], split=False)
+            ]
+            cutoff = False
+            description = "Saving..."
 
-        else:
-            for idx, comment in track(enumerate(self.reddit_object["comments"]), "Saving..."):
+            if settings.config["settings"]["storymode"]:
+                if settings.config["settings"]["storymodemethod"] == 0:
+                    jobs.append(self._job("postaudio", self.reddit_object["thread_post"]))
+                elif settings.config["settings"]["storymodemethod"] == 1:
+                    jobs += [
+                        self._job(f"postaudio-{idx}", text, split=False)
+                        for idx, text in enumerate(self.reddit_object["thread_post"])
+                    ]
+                    description = "Working..."
+            else:
+                jobs += [
+                    self._job(f"{idx}", comment["comment_body"])
+                    for idx, comment in enumerate(self.reddit_object["comments"])
+                ]
+                cutoff = True
+
+            idx = self._collect(jobs, description, cutoff)
+            write_manifest(self.redditid, self.clips)
+            self.span.add_files(*(clip["path"] for clip in self.clips))
+            self.span.attrs["clips"] = len(self.clips)
+
+            if self.cache is not None:
+                self.cache.evict()
+                print_substep(
+                    f"TTS cache: {self.cache.hits} hits, {self.cache.misses} misses", style="bold blue"
+                )
+            print_substep("Saved Text to MP3 files successfully.", style="bold green")
+        return self.length, idx
+
+    def max_workers(self) -> int:
+        """Number of parallel TTS requests: the module's limit, optionally lowered by the config."""
+        limit = getattr(self.tts_module, "max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        configured = int(settings.config["settings"]["tts"].get("tts_max_workers", 0) or 0)
+        return max(1, min(limit, configured) if configured > 0 else limit)
+
+    def _job(self, filename: str, text: str, split: bool = True):
+        """Returns a callable synthesizing one clip (split if too long).
+
+        The callable returns the clip's manifest entry and the durations of its parts.
+        """
+
+        def job() -> Tuple[Optional[Dict], List[Optional[float]]]:
+            if split and len(text) > self.tts_module.max_chars:  # Split the text if it is too long
+                parts = self.split_post(text, filename)
+                spoken = " ".join(part_text for part_text, _ in parts)
+                durations = [duration for _, duration in parts]
+                return self._manifest_entry(filename, spoken), durations
+            spoken = process_text(text)
+            entry = self._synthesize(filename, spoken)
+            return entry, [entry["duration"] if entry else None]
+
+        return job
+
+    def _manifest_entry(self, filename: str, text: str) -> Optional[Dict]:
+        path = f"{self.path}/{filename}.mp3"
+        try:
+            return {"name": filename, "path": path, "text": text, **probe_audio(path)}
+        except Exception:
+            return None
+
+    def _collect(self, jobs: list, description: str, cutoff: bool) -> int:
+        """Runs jobs[0] (the title) and jobs[1:] (the content) on the worker pool.
+
+        Returns the index of the last content clip the way the sequential loop did.
+        """
+        workers = self.max_workers()
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        futures = deque()
+        submitted = 0
+
+        def top_up():
+            # never run more than `workers` clips ahead, so a cutoff wastes at most that many
+            nonlocal submitted
+            while submitted < len(jobs) and len(futures) < workers:
+                futures.append(pool.submit(jobs[submitted]))
+                submitted += 1
+
+        idx = 0
+        try:
+            top_up()
+            self._consume(futures.popleft().result())  # title
+            top_up()
+            for idx in track(range(len(jobs) - 1), description):
                 # ! Stop creating mp3 files if the length is greater than max length.
-                if self.length > self.max_length and idx > 1:
+                if cutoff and self.length > self.max_length and idx > 1:
                     self.length -= self.last_clip_length
                     idx -= 1
                     break
-                if (
-                    len(comment["comment_body"]) > self.tts_module.max_chars
-                ):  # Split the comment if it is too long
-                    self.split_post(comment["comment_body"], idx)  # Split the comment
-                else:  # If the comment is not too long, just call the tts engine
-                    self.call_tts(f"{idx}", process_text(comment["comment_body"]))
-
-        print_substep("Saved Text to MP3 files successfully.", style="bold green")
-        return self.length, idx
+                self._consume(futures.popleft().result())
+                top_up()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        return idx
 
-    def split_post(self, text: str, idx):
-        """Splits a long text into smaller parts and concatenates the resulting audio files."""
-        split_files = []
-        split_text = [
-            x.group().strip()
-            for x in re.finditer(
-                r" *(((.|\n){0," + str(self.tts_module.max_chars) + "})(\.|.$))", text
-            )
-        ]
-        self.create_silence_mp3()
+    def _consume(self, result: Tuple[Optional[Dict], List[Optional[float]]]):
+        entry, durations = result
+        if entry is not None:
+            self.clips.append(entry)
+        self._add_lengths(durations)
 
-        idy = None
-        for idy, text_cut in enumerate(split_text):
-            newtext = process_text(text_cut)
-            # print(f"{idx}-{idy}: {newtext}\n")
+    def _add_lengths(self, durations: List[Optional[float]]):
+        for duration in durations:
+            if duration is None:
+                self.length = 0
+            else:
+                self.last_clip_length = duration
+                self.length += duration
+
+    def split_post(self, text: str, idx) -> List[Tuple[str, Optional[float]]]:
+        """Splits a long text into smaller parts and concatenates the resulting audio files.
 
+        The parts are synthesized one after another and joined (plus the silence
+        gap) by a single ffmpeg concat once all of them exist.
+        Returns the processed text and the duration of every part.
+        """
+        parts = []
+        entries = []
+        for idy, text_cut in enumerate(split_text(text, self.tts_module.max_chars)):
+            newtext = process_text(text_cut)
             if not newtext or newtext.isspace():
                 print("newtext was blank because sanitized split text resulted in none")
                 continue
-            else:
-                self.call_tts(f"{idx}-{idy}.part", newtext)
-                with open(f"{self.path}/list.txt", "w") as f:
-                    for idz in range(0, len(split_text)):
-                        f.write("file " + f"'{idx}-{idz}.part.mp3'" + "\n")
-                    split_files.append(str(f"{self.path}/{idx}-{idy}.part.mp3"))
-                    f.write("file " + f"'silence.mp3'" + "\n")
-
-                os.system(
-                    "ffmpeg -f concat -y -hide_banner -loglevel panic -safe 0 "
-                    + "-i "
-                    + f"{self.path}/list.txt "
-                    + "-c copy "
-                    + f"{self.path}/{idx}.mp3"
+            part = self._synthesize(f"{idx}-{idy}.part", newtext)
+            parts.append((newtext, part["duration"] if part else None))
+            if part is not None:
+                entries.append(part)
+
+        if entries:
+            first = entries[0]
+            silence = silence_file(
+                float(settings.config["settings"]["tts"]["silence_duration"]),
+                first["sample_rate"] or 44100,
+                first["channels"] or 1,
+            )
+            list_path = f"{self.path}/{idx}.list.txt"
+            with open(list_path, "w", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(f"file '{os.path.abspath(entry['path'])}'\n")
+                if silence:
+                    f.write(f"file '{os.path.abspath(silence)}'\n")
+            try:
+                (
+                    ffmpeg.input(list_path, f="concat", safe=0)
+                    .output(f"{self.path}/{idx}.mp3", c="copy")
+                    .overwrite_output()
+                    .run(quiet=True)
                 )
-        try:
-            for i in range(0, len(split_files)):
-                os.unlink(split_files[i])
-        except FileNotFoundError as e:
-            print("File not found: " + e.filename)
-        except OSError:
-            print("OSError")
+            except ffmpeg.Error as e:
+                stderr = e.stderr.decode(errors="replace") if e.stderr else ""
+                print_substep(f"Could not join the parts of {idx}: {stderr[-300:]}", style="bold red")
+
+        for path in [entry["path"] for entry in entries] + [f"{self.path}/{idx}.list.txt"]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        return parts
 
     def call_tts(self, filename: str, text: str):
         """Calls the TTS engine to convert text to speech and saves the output as an MP3 file."""
-        self.tts_module.run(
-            text,
-            filepath=f"{self.path}/{filename}.mp3",
-            random_voice=settings.config["settings"]["tts"]["random_voice"],
-        )
-        # try:
-        #     self.length += MP3(f"{self.path}/{filename}.mp3").info.length
-        # except (MutagenError, HeaderNotFoundError):
-        #     self.length += sox.file_info.duration(f"{self.path}/{filename}.mp3")
-        try:
-            clip = AudioFileClip(f"{self.path}/{filename}.mp3")
-            self.last_clip_length = clip.duration
-            self.length += clip.duration
-            clip.close()
-        except:
-            self.length = 0
-
-    def create_silence_mp3(self):
-        """Creates an MP3 file containing silence for concatenation purposes."""
-        silence_duration = settings.config["settings"]["tts"]["silence_duration"]
-        silence = AudioClip(
-            make_frame=lambda t: np.sin(440 * 2 * np.pi * t),
-            duration=silence_duration,
-            fps=44100,
-        )
-        silence = volumex(silence, 0)
-        silence.write_audiofile(f"{self.path}/silence.mp3", fps=44100, verbose=False, logger=None)
+        entry = self._synthesize(filename, text)
+        self._consume((entry, [entry["duration"] if entry else None]))
+
+    def _synthesize(self, filename: str, text: str) -> Optional[Dict]:
+        """Runs the TTS module for one clip and returns its manifest entry (None if unreadable).
+
+        Safe to call from worker threads: doesn't touch the shared length counters.
+        Identical requests are served from the TTS cache without calling the provider.
+        """
+        filepath = f"{self.path}/{filename}.mp3"
+        random_voice = settings.config["settings"]["tts"]["random_voice"]
+        key = self.cache.key(self.tts_module, text, random_voice) if self.cache else None
+        if key is None or not self.cache.fetch(key, filepath):
+            self.tts_module.run(text, filepath=filepath, random_voice=random_voice)
+            self.span.add(api_calls=1)
+            if key is not None:
+                self.cache.store(key, filepath)
+        else:
+            self.span.add(cache_hits=1)
+        # duration, sample rate and codec come from the MP3 frame headers, no ffmpeg process
+        return self._manifest_entry(filename, text)
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """Splits text into chunks of at most max_chars, preferably after a sentence.
+
+    Sentences are packed greedily; a sentence longer than max_chars is cut at
+    the last space (or hard, if it has none). Runs in linear time.
+    """
+    chunks = []
+    start = end = 0  # current chunk is text[start:end]
+    for match in _SENTENCE.finditer(text):
+        if not match.group():
+            continue
+        if match.end() - start <= max_chars:
+            end = match.end()
+            continue
+        if end > start:
+            chunks.append(text[start:end])
+            start = end
+        # a single sentence longer than the limit
+        while match.end() - start > max_chars:
+            window = (start + 1, start + max_chars)
+            cut = max(text.rfind(" ", *window), text.rfind("\n", *window))
+            cut = cut if cut > start else start + max_chars
+            chunks.append(text[start:cut])
+            start = cut
+        end = match.end()
+    if end > start:
+        chunks.append(text[start:end])
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def silence_file(duration: float, sample_rate: int = 44100, channels: int = 1) -> Optional[str]:
+    """MP3 of silence matching the clips it is concatenated with (None for no gap).
+
+    Generated once per duration / sample rate / channel count and reused by
+    every clip and every run.
+    """
+    if duration <= 0:
+        return None
+    key = (round(duration, 3), int(sample_rate), int(channels))
+    with _silence_lock:
+        path = _silence_files.get(key)
+        if path and os.path.exists(path):
+            return path
+        path = f"{SILENCE_DIR}/silence-{key[0]}s-{key[1]}hz-{key[2]}ch.mp3"
+        if not os.path.exists(path):
+            Path(SILENCE_DIR).mkdir(parents=True, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp.mp3"
+            layout = "mono" if channels == 1 else "stereo"
+            (
+                ffmpeg.input(f"anullsrc=r={key[1]}:cl={layout}", f="lavfi", t=key[0])
+                .output(tmp, acodec="libmp3lame", ac=key[2], ar=key[1])
+                .overwrite_output()
+                .run(quiet=True)
+            )
+            os.replace(tmp, path)
+        _silence_files[key] = path
+        return path
 
 
 def process_text(text: str, clean: bool = True):
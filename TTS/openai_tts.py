@@ -21,6 +21,7 @@ class OpenAITTS:
         # Set maximum input size based on API limits 
         # (4096 characters for tts-1/tts-1-hd, 2000 tokens for gpt-4o-mini-tts)
         self.max_chars = 4096  # Will be adjusted per model in run() method
+        self.max_concurrency = 8  # parallel requests TTSEngine may run
         self.api_key = settings.config["settings"]["tts"].get("openai_api_key")
         if not self.api_key:
             raise ValueError("No OpenAI API key provided in settings! Please set 'openai_api_key' in your config.")
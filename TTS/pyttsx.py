@@ -8,6 +8,7 @@ from utils import settings
 class pyttsx:
     def __init__(self):
         self.max_chars = 5000
+        self.max_concurrency = 1  # pyttsx3 engines are not thread-safe
         self.voices = []
 
     def run(
@@ -32,6 +32,7 @@ class StreamlabsPolly:
     def __init__(self):
         self.url = "https://streamlabs.com/polly/speak"
         self.max_chars = 550
+        self.max_concurrency = 2
         self.voices = voices
 
     def run(self, text, filepath, random_voice: bool = False):
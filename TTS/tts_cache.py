@@ -0,0 +1,144 @@
+"""
+Content-addressed cache for synthesized TTS clips.
+
+Clips are keyed on the TTS provider, the provider settings that change the
+audio (voice, model, speed, ...) and the processed text. The audio and an
+optional sidecar (e.g. Kokoro's <clip>.mp3.json timestamps) are stored in
+assets/tts_cache/ and evicted least-recently-used once the configured disk
+budget is exceeded.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils import settings
+
+DEFAULT_CACHE_DIR = "assets/tts_cache"
+SIDECAR_SUFFIX = ".json"
+
+# settings (from [settings.tts]) that change the audio a provider returns for the same text
+PROVIDER_SETTINGS: Dict[str, tuple] = {
+    "GTTS": (),
+    "AWSPolly": ("aws_polly_voice",),
+    "StreamlabsPolly": ("streamlabs_polly_voice",),
+    "TikTok": ("tiktok_voice",),
+    "pyttsx": ("python_voice", "py_voice_num"),
+    "elevenlabs": ("elevenlabs_voice_name",),
+    "OpenAITTS": (
+        "openai_api_url",
+        "openai_voice_name",
+        "openai_model",
+        "openai_speed",
+        "openai_instructions",
+    ),
+    "KokoroTTS": ("kokoro_url", "kokoro_voice", "kokoro_model", "kokoro_captioned"),
+    "GoogleCloudTTS": ("gcloud_voice", "gcloud_language_code", "gcloud_speed"),
+    "SpeechifyTTS": (
+        "speechify_voice_id",
+        "speechify_audio_format",
+        "speechify_language_code",
+        "speechify_model",
+    ),
+}
+# never part of a key (and never written to disk)
+SECRET_MARKERS = ("key", "sessionid", "sa_json", "token")
+
+
+class TTSCache:
+    """LRU disk cache of TTS clips. Thread-safe, so TTSEngine workers can share it."""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = 1024 * 1024**2):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> Optional["TTSCache"]:
+        """Returns the configured cache, or None if caching is disabled."""
+        cfg = settings.config["settings"]["tts"]
+        if not cfg.get("tts_cache_enabled", True):
+            return None
+        max_mb = float(cfg.get("tts_cache_max_mb", 1024) or 0)
+        return cls(cfg.get("tts_cache_dir") or DEFAULT_CACHE_DIR, int(max_mb * 1024**2))
+
+    def key(self, tts_module, text: str, random_voice: bool) -> str:
+        tts_cfg = settings.config["settings"]["tts"]
+        provider = type(tts_module).__name__
+        names = PROVIDER_SETTINGS.get(provider)
+        if names is None:  # unknown provider: everything that isn't a secret
+            names = sorted(k for k in tts_cfg if not any(m in k for m in SECRET_MARKERS))
+        payload = {
+            "provider": provider,
+            "settings": {name: tts_cfg.get(name) for name in names},
+            "lang": settings.config["reddit"]["thread"]["post_lang"],
+            "random_voice": bool(random_voice),
+            "text": text,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry(self, key: str, filepath: str) -> Path:
+        return self.directory / f"{key}{Path(filepath).suffix}"
+
+    def fetch(self, key: str, filepath: str) -> bool:
+        """Copies a cached clip (and its sidecar) to filepath. Returns False on a miss."""
+        entry = self._entry(key, filepath)
+        try:
+            shutil.copyfile(entry, filepath)
+            sidecar = Path(f"{entry}{SIDECAR_SUFFIX}")
+            if sidecar.exists():
+                shutil.copyfile(sidecar, f"{filepath}{SIDECAR_SUFFIX}")
+            os.utime(entry)  # mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key: str, filepath: str) -> None:
+        """Adds a freshly synthesized clip (and its sidecar, if any) to the cache."""
+        if not os.path.isfile(filepath) or os.path.getsize(filepath) == 0:
+            return
+        entry = self._entry(key, filepath)
+        sidecar = f"{filepath}{SIDECAR_SUFFIX}"
+        if os.path.isfile(sidecar):
+            self._copy_atomic(sidecar, Path(f"{entry}{SIDECAR_SUFFIX}"))
+        self._copy_atomic(filepath, entry)
+
+    @staticmethod
+    def _copy_atomic(src: str, dst: Path) -> None:
+        tmp = dst.with_name(f"{dst.name}.{threading.get_ident()}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+
+    def evict(self) -> int:
+        """Deletes least recently used clips until the cache fits the budget. Returns the count."""
+        clips = []
+        total = 0
+        for item in os.scandir(self.directory):
+            if not item.is_file() or item.name.endswith((SIDECAR_SUFFIX, ".tmp")):
+                continue
+            sidecar = Path(f"{item.path}{SIDECAR_SUFFIX}")
+            size = item.stat().st_size + (sidecar.stat().st_size if sidecar.exists() else 0)
+            clips.append((item.stat().st_mtime, size, Path(item.path), sidecar))
+            total += size
+
+        removed = 0
+        for _, size, path, sidecar in sorted(clips):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            sidecar.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,121 @@
+"""
+Offline stand-ins for the network parts of the pipeline.
+
+FakeReddit replays the threads of a fixture JSON through the subset of the
+praw API that reddit/subreddit.py and utils/subreddit.py use, BenchmarkTTS
+"speaks" every text as a tone of realistic length (CHARS_PER_SECOND), so
+TTS, captions and rendering see the same amount of audio as with a real voice.
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Dict, List
+
+import ffmpeg
+
+from reddit.subreddit import CHARS_PER_SECOND
+
+
+class FakeRedditor:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class FakeSubredditRef:
+    def __init__(self, display_name: str):
+        self.display_name = display_name
+
+
+class FakeComment:
+    def __init__(self, data: Dict, permalink: str):
+        self.id = data["id"]
+        self.body = data["body"]
+        self.score = data.get("score", 1)
+        self.stickied = data.get("stickied", False)
+        self.author = FakeRedditor(data["author"]) if data.get("author") else None
+        self.permalink = f"{permalink}{self.id}/"
+
+
+class FakeSubmission:
+    def __init__(self, data: Dict, subreddit: str):
+        self.id = data["id"]
+        self.title = data["title"]
+        self.selftext = data.get("selftext", "")
+        self.score = data.get("score", 1)
+        self.upvote_ratio = data.get("upvote_ratio", 1.0)
+        self.num_comments = data.get("num_comments", len(data.get("comments", [])))
+        self.over_18 = data.get("over_18", False)
+        self.stickied = data.get("stickied", False)
+        self.is_self = data.get("is_self", True)
+        self.author = FakeRedditor(data["author"]) if data.get("author") else None
+        self.subreddit = FakeSubredditRef(subreddit)
+        self.permalink = f"/r/{subreddit}/comments/{self.id}/"
+        self.comment_sort = "confidence"
+        self.comment_limit = 2048
+        self._fetched = False
+        self._comments = data.get("comments", [])
+        self._fetch_params: Dict = {}
+
+    def __str__(self) -> str:  # like praw: str(submission) is its id
+        return self.id
+
+    def add_fetch_param(self, key, value) -> None:
+        self._fetch_params[key] = value
+
+    @property
+    def comments(self) -> List[FakeComment]:
+        self._fetched = True
+        return [FakeComment(c, self.permalink) for c in self._comments[: self.comment_limit]]
+
+
+class FakeSubreddit:
+    def __init__(self, name: str, submissions: List[FakeSubmission]):
+        self.display_name = name
+        self._submissions = submissions
+
+    def hot(self, limit: int = 25):
+        return iter(self._submissions[:limit])
+
+    def top(self, time_filter: str = "all", limit: int = 25):
+        return iter(self._submissions[:limit])
+
+
+class FakeReddit:
+    """Replays a fixture file: {"subreddit": name, "threads": [submission dicts with "comments"]}."""
+
+    def __init__(self, fixture_path: str):
+        with open(fixture_path, encoding="utf-8") as f:
+            fixture = json.load(f)
+        self.subreddit_name = fixture["subreddit"]
+        self._threads = fixture["threads"]
+
+    def _submissions(self) -> List[FakeSubmission]:
+        # frische Objekte pro Aufruf – wie praw, das jedes Listing neu lädt
+        return [FakeSubmission(t, self.subreddit_name) for t in self._threads]
+
+    def subreddit(self, name: str) -> FakeSubreddit:
+        return FakeSubreddit(name, self._submissions())
+
+    def submission(self, id: str) -> FakeSubmission:
+        return next(s for s in self._submissions() if s.id == id)
+
+
+class BenchmarkTTS:
+    """Deterministic TTS provider: a sine tone as long as the text would take to say."""
+
+    def __init__(self):
+        self.max_chars = 5000
+        self.max_concurrency = 4
+
+    def run(self, text: str, filepath: str, random_voice: bool = False):
+        duration = max(0.5, len(text) / CHARS_PER_SECOND)
+        frequency = 180 + zlib.crc32(text.encode("utf-8")) % 120
+        (
+            ffmpeg.input(
+                f"sine=frequency={frequency}:sample_rate=44100:duration={duration:.3f}", f="lavfi"
+            )
+            .output(filepath, acodec="libmp3lame", audio_bitrate="128k", ac=1)
+            .overwrite_output()
+            .run(quiet=True)
+        )
@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+"""
+End-to-end pipeline benchmark – offline.
+
+    python -m benchmarks.pipeline                      # all modes, compare with benchmarks/baseline.json
+    python -m benchmarks.pipeline --modes comments --repeat 3
+    python -m benchmarks.pipeline --save-baseline      # store this run as the new baseline
+    python -m benchmarks.pipeline --set settings.encoding.profile=\"draft\"
+
+Runs get_subreddit_threads → save_text_to_mp3 → generate_comment_cards →
+chop_background → make_final_video for comment mode and both story modes
+against fixture threads (FakeReddit), a deterministic TTS provider
+(BenchmarkTTS) and synthetic lavfi background footage, and records wall
+time, CPU time (this process + ffmpeg children) and the peak RSS per stage.
+
+Nothing touches the real done-video store, TTS cache or backgrounds: the
+store lives in a temp dir, the TTS cache is off and the synthetic footage is
+registered under its own "benchmark" background name.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import math
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    import resource  # not on Windows
+except ImportError:
+    resource = None
+
+import toml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FIXTURE = REPO_ROOT / "benchmarks" / "fixtures" / "threads.json"
+DEFAULT_BASELINE = REPO_ROOT / "benchmarks" / "baseline.json"
+DEFAULT_OUTPUT = REPO_ROOT / "benchmarks" / "last_run.json"
+
+STAGES = ("fetch", "tts", "cards", "background", "render")
+MODES = {
+    "comments": {"storymode": False},
+    "story-0": {"storymode": True, "storymodemethod": 0},
+    "story-1": {"storymode": True, "storymodemethod": 1},
+}
+NOISE_FLOOR_S = 0.05  # kleinere Unterschiede sind Messrauschen, nie eine Regression
+
+
+# ═══════════════════ Config ═════════════════════════════════════════════════════
+def template_defaults(template: dict) -> dict:
+    """The config a fresh install would get: default (or example) of every template entry."""
+    config = {}
+    for key, value in template.items():
+        if isinstance(value, dict) and not ({"default", "optional", "explanation"} & value.keys()):
+            config[key] = template_defaults(value)
+        elif isinstance(value, dict):
+            config[key] = value.get("default", value.get("example", ""))
+    return config
+
+
+def set_path(config: dict, dotted: str, value) -> None:
+    *parents, leaf = dotted.split(".")
+    for part in parents:
+        config = config.setdefault(part, {})
+    config[leaf] = value
+
+
+def benchmark_config(subreddit: str, caption_mode: str, overrides: List[str]) -> dict:
+    config = template_defaults(toml.load(REPO_ROOT / "utils" / ".config.template.toml"))
+    for dotted, value in {
+        "reddit.thread.subreddit": subreddit,
+        "reddit.thread.post_id": "",
+        "reddit.thread.post_lang": "",
+        "ai.ai_similarity_enabled": False,
+        "settings.times_to_run": 1,
+        "settings.tts.voice_choice": "Benchmark",
+        "settings.tts.random_voice": False,
+        "settings.tts.tts_cache_enabled": False,
+        "settings.rewriter.enabled": False,
+        "settings.captions.caption_mode": caption_mode,
+        "settings.background.background_thumbnail": False,
+        "settings.background.enable_extra_audio": False,
+        "settings.metrics.enabled": False,  # keine Benchmark-Läufe in der echten metrics.jsonl
+    }.items():
+        set_path(config, dotted, value)
+    for override in overrides:  # --set a.b.c=<toml value>
+        dotted, _, raw = override.partition("=")
+        set_path(config, dotted.strip(), toml.loads(f"v = {raw}")["v"])
+    return config
+
+
+# ═══════════════════ Messung ════════════════════════════════════════════════════
+def _rusage():
+    if resource is None:
+        return time.process_time(), 0.0, 0.0, 0.0
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes on macOS, KiB elsewhere
+    return (
+        own.ru_utime + own.ru_stime,
+        children.ru_utime + children.ru_stime,
+        own.ru_maxrss / scale,
+        children.ru_maxrss / scale,
+    )
+
+
+@contextmanager
+def measure(results: Dict, stage: str):
+    """Wall time, CPU time (own + finished children) and peak RSS in MB of one stage.
+
+    The RSS values are high-water marks: the process' peak so far and the
+    largest child (ffmpeg, render workers) so far.
+    """
+    cpu_own, cpu_children, _, _ = _rusage()
+    start = time.perf_counter()
+    yield
+    wall = time.perf_counter() - start
+    cpu_own_end, cpu_children_end, rss, rss_children = _rusage()
+    results[stage] = {
+        "wall_s": round(wall, 3),
+        "cpu_s": round((cpu_own_end - cpu_own) + (cpu_children_end - cpu_children), 3),
+        "peak_rss_mb": round(rss, 1),
+        "peak_child_rss_mb": round(rss_children, 1),
+    }
+
+
+# ═══════════════════ Setup ══════════════════════════════════════════════════════
+def synthetic_background(seconds: int) -> Dict[str, list]:
+    """lavfi test footage + tone, created once under the 'benchmark' background name."""
+    import ffmpeg
+
+    from video_creation.background import background_options
+
+    video = ["lavfi:testsrc2", "synthetic.mp4", "benchmark", "center"]
+    audio = ["lavfi:sine", "synthetic.mp3", "benchmark"]
+    video_path = Path(f"assets/backgrounds/video/{video[2]}-{video[1]}")
+    audio_path = Path(f"assets/backgrounds/audio/{audio[2]}-{audio[1]}")
+    video_path.parent.mkdir(parents=True, exist_ok=True)
+    audio_path.parent.mkdir(parents=True, exist_ok=True)
+    if not video_path.exists():
+        print(f"Creating {seconds}s of synthetic background footage (once)...")
+        (
+            ffmpeg.input(f"testsrc2=size=1920x1080:rate=30:duration={seconds}", f="lavfi")
+            .output(
+                str(video_path), vcodec="libx264", preset="ultrafast", crf=28, g=60, pix_fmt="yuv420p"
+            )
+            .overwrite_output()
+            .run(quiet=True)
+        )
+    if not audio_path.exists():
+        (
+            ffmpeg.input(f"sine=frequency=220:sample_rate=44100:duration={seconds}", f="lavfi")
+            .output(str(audio_path), acodec="libmp3lame", audio_bitrate="128k")
+            .overwrite_output()
+            .run(quiet=True)
+        )
+    background_options["video"]["benchmark"] = video
+    background_options["audio"]["benchmark"] = audio
+    return {"video": video, "audio": audio}
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=REPO_ROOT
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    try:
+        ffmpeg_version = subprocess.run(
+            ["ffmpeg", "-version"], capture_output=True, text=True
+        ).stdout.split("\n", 1)[0]
+    except OSError:
+        ffmpeg_version = ""
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": ffmpeg_version,
+        "time": int(time.time()),
+    }
+
+
+# ═══════════════════ Lauf ═══════════════════════════════════════════════════════
+def run_mode(mode: str, base_config: dict, bg_config: dict) -> Dict[str, Dict]:
+    import utils.videos
+    from reddit.subreddit import get_subreddit_threads
+    from utils import settings
+    from utils.videos import release
+    from video_creation.background import chop_background
+    from video_creation.comment_card_renderer import generate_comment_cards
+    from video_creation.final_video import make_final_video
+    from video_creation.voices import save_text_to_mp3
+
+    config = copy.deepcopy(base_config)
+    for key, value in MODES[mode].items():
+        config["settings"][key] = value
+    settings.config = config
+
+    results: Dict[str, Dict] = {}
+    with measure(results, "fetch"):
+        reddit_object = get_subreddit_threads(None)
+    reddit_id = reddit_object["thread_id"]
+    try:
+        with measure(results, "tts"):
+            length, number_of_comments = save_text_to_mp3(reddit_object)
+        length = math.ceil(length)
+        with measure(results, "cards"):
+            generate_comment_cards(reddit_object, f"assets/temp/{reddit_id}/png", number_of_comments)
+        with measure(results, "background"):
+            chop_background(bg_config, length, reddit_object)
+        with measure(results, "render"):
+            video_path = make_final_video(number_of_comments, length, reddit_object, bg_config)
+        results["video_seconds"] = length
+        if video_path and os.path.exists(video_path):
+            os.remove(video_path)
+    finally:
+        release(reddit_id)
+        shutil.rmtree(f"assets/temp/{reddit_id}", ignore_errors=True)
+        with sqlite3.connect(utils.videos.DB_PATH) as store:  # next run picks the same thread again
+            store.execute("DELETE FROM videos")
+    return results
+
+
+def aggregate(runs: List[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Median wall/CPU time and maximum RSS over the repetitions."""
+    summary: Dict[str, Dict] = {}
+    for stage in STAGES:
+        samples = [run[stage] for run in runs]
+        summary[stage] = {
+            "wall_s": round(statistics.median(s["wall_s"] for s in samples), 3),
+            "cpu_s": round(statistics.median(s["cpu_s"] for s in samples), 3),
+            "peak_rss_mb": max(s["peak_rss_mb"] for s in samples),
+            "peak_child_rss_mb": max(s["peak_child_rss_mb"] for s in samples),
+        }
+    summary["total"] = {
+        "wall_s": round(sum(summary[stage]["wall_s"] for stage in STAGES), 3),
+        "cpu_s": round(sum(summary[stage]["cpu_s"] for stage in STAGES), 3),
+    }
+    summary["video_seconds"] = runs[0]["video_seconds"]
+    return summary
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Prints new vs. baseline per stage; returns the regressions (slower by more than tolerance)."""
+    regressions = []
+    print(f"\nComparison with baseline {baseline.get('environment', {}).get('commit', '?')}:")
+    for mode, stages in results["modes"].items():
+        old_stages = baseline.get("modes", {}).get(mode)
+        if not old_stages:
+            print(f"  {mode}: not in baseline")
+            continue
+        for stage in (*STAGES, "total"):
+            for metric in ("wall_s", "cpu_s"):
+                new, old = stages[stage][metric], old_stages.get(stage, {}).get(metric)
+                if old is None:
+                    continue
+                change = (new - old) / old if old else 0.0
+                flag = ""
+                if change > tolerance and new - old > NOISE_FLOOR_S:
+                    flag = "  << REGRESSION"
+                    regressions.append(f"{mode}/{stage}/{metric}: {old:.3f}s -> {new:.3f}s ({change:+.0%})")
+                print(f"  {mode:9} {stage:10} {metric:6} {old:8.3f} -> {new:8.3f}  {change:+7.1%}{flag}")
+    return regressions
+
+
+def print_table(results: Dict) -> None:
+    print(f"\n{'mode':9} {'stage':10} {'wall s':>8} {'cpu s':>8} {'rss MB':>8} {'child MB':>9}")
+    for mode, stages in results["modes"].items():
+        for stage in STAGES:
+            s = stages[stage]
+            print(
+                f"{mode:9} {stage:10} {s['wall_s']:8.3f} {s['cpu_s']:8.3f} "
+                f"{s['peak_rss_mb']:8.1f} {s['peak_child_rss_mb']:9.1f}"
+            )
+        total = stages["total"]
+        print(f"{mode:9} {'total':10} {total['wall_s']:8.3f} {total['cpu_s']:8.3f}   ({stages['video_seconds']}s video)")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the video pipeline.")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=1, help="runs per mode; medians are reported")
+    parser.add_argument("--fixture", default=str(FIXTURE), help="threads replayed by the fake Reddit")
+    parser.add_argument("--caption-mode", default="default_PNG", choices=["default_PNG", "whisper", "aligned"])
+    parser.add_argument("--background-seconds", type=int, default=360, help="length of the synthetic footage")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="config override with a TOML value, e.g. settings.encoding.profile=\"draft\"")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before failing (0.15 = 15%%)")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    args = parser.parse_args(argv)
+
+    os.chdir(REPO_ROOT)  # the pipeline works with paths relative to the repo
+    sys.path.insert(0, str(REPO_ROOT))
+
+    from benchmarks.fakes import BenchmarkTTS, FakeReddit
+    from utils import settings
+
+    fake_reddit = FakeReddit(args.fixture)
+    base_config = benchmark_config(fake_reddit.subreddit_name, args.caption_mode, args.set)
+    settings.config = base_config
+
+    import reddit.subreddit
+    import utils.videos
+    import video_creation.voices
+
+    store = tempfile.mkdtemp(prefix="rvmb-bench-")
+    utils.videos.DB_PATH = os.path.join(store, "videos.db")
+    utils.videos.LEGACY_JSON_PATH = os.path.join(store, "videos.json")
+    reddit.subreddit.get_reddit = lambda: fake_reddit
+    video_creation.voices.TTSProviders["Benchmark"] = BenchmarkTTS
+
+    bg_config = synthetic_background(args.background_seconds)
+    results = {"environment": environment(), "config_overrides": args.set, "modes": {}}
+    try:
+        for mode in args.modes:
+            runs = []
+            for i in range(args.repeat):
+                print(f"\n=== {mode} ({i + 1}/{args.repeat}) ===")
+                runs.append(run_mode(mode, base_config, bg_config))
+            results["modes"][mode] = aggregate(runs)
+    finally:
+        shutil.rmtree(store, ignore_errors=True)
+        shutil.rmtree(os.path.join("results", fake_reddit.subreddit_name), ignore_errors=True)
+
+    print_table(results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline yet – run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print("\nRegressions:\n  " + "\n  ".join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
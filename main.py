@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-import math, sys, argparse
+import math, re, sys, argparse, threading
 from os import name
 from pathlib import Path
 from subprocess import Popen
@@ -8,12 +8,16 @@ from typing import NoReturn
 from prawcore import ResponseException
 
 from reddit.subreddit import get_subreddit_threads
-from utils import settings
+from utils import metrics, settings
+from utils.checkpoint import Checkpoints, fingerprint
 from utils.cleanup import cleanup
+from utils.clip_manifest import manifest_path
 from utils.console import print_markdown, print_step, print_substep
 from utils.ffmpeg_install import ffmpeg_install
 from utils.id import id
+from utils.pipeline import Stage, run_pipeline
 from utils.version import checkversion
+from utils.videos import claim, release
 from video_creation.background import (
     chop_background,
     download_background_audio,
@@ -27,8 +31,11 @@ from utils.rewriter import rewrite_reddit
 
 __VERSION__ = "3.3.0"
 
-print(
-    """
+
+def print_banner() -> None:
+    # nicht beim Import: Worker-Prozesse (spawn/forkserver) laden main.py erneut als __mp_main__
+    print(
+        """
 ██████╗ ███████╗██████╗ ██████╗ ██╗████████╗    ██╗   ██╗██╗██████╗ ███████╗ ██████╗     ███╗   ███╗ █████╗ ██╗  ██╗███████╗██████╗
 ██╔══██╗██╔════╝██╔══██╗██╔══██╗██║╚══██╔══╝    ██║   ██║██║██╔══██╗██╔════╝██╔═══██╗    ████╗ ████║██╔══██╗██║ ██╔╝██╔════╝██╔══██╗
 ██████╔╝█████╗  ██║  ██║██║  ██║██║   ██║       ██║   ██║██║██║  ██║█████╗  ██║   ██║    ██╔████╔██║███████║█████╔╝ █████╗  ██████╔╝
@@ -36,34 +43,165 @@ print(
 ██║  ██║███████╗██████╔╝██████╔╝██║   ██║        ╚████╔╝ ██║██████╔╝███████╗╚██████╔╝    ██║ ╚═╝ ██║██║  ██║██║  ██╗███████╗██║  ██║
 ╚═╝  ╚═╝╚══════╝╚═════╝ ╚═════╝ ╚═╝   ╚═╝         ╚═══╝  ╚═╝╚═════╝ ╚══════╝ ╚═════╝     ╚═╝     ╚═╝╚═╝  ╚═╝╚═╝  ╚═╝╚══════╝╚═╝  ╚═╝
 """
-)
-print_markdown(
-    "### Thanks for using this tool! Feel free to contribute to this project on GitHub! If you have any questions, feel free to join my Discord server or submit a GitHub issue. You can find solutions to many common problems in the documentation: https://reddit-video-maker-bot.netlify.app/"
-)
-checkversion(__VERSION__)
+    )
+    print_markdown(
+        "### Thanks for using this tool! Feel free to contribute to this project on GitHub! If you have any questions, feel free to join my Discord server or submit a GitHub issue. You can find solutions to many common problems in the documentation: https://reddit-video-maker-bot.netlify.app/"
+    )
 
 
-def main(POST_ID=None) -> None:
-    global redditid, reddit_object
-    reddit_object = get_subreddit_threads(POST_ID)
+_active_ids: set = set()  # threads with temp files (batch mode: several at once)
+_background_lock = threading.Lock()  # background downloads are shared between jobs
+
+
+def fetch_stage(POST_ID=None) -> dict:
+    """Picks the thread and (optionally) rewrites it. Network-bound."""
+    with metrics.span(None, "fetch") as span:
+        reddit_object = get_subreddit_threads(POST_ID)
+        span.reddit_id = reddit_object["thread_id"]
+        span.attrs["comments"] = len(reddit_object.get("comments", []))
+    checkpoints = Checkpoints(reddit_object["thread_id"])
+    checkpoints.complete("fetch", fingerprint(reddit_object["thread_id"]), result=reddit_object)
+    return _rewrite_claimed(reddit_object, checkpoints)
+
+
+def resume_stage(thread_id: str) -> dict:
+    """Loads the thread fetched by an earlier (crashed) run instead of asking Reddit again."""
+    checkpoints = Checkpoints(thread_id)
+    record = checkpoints.record("fetch")
+    if record is None:
+        print_substep(f"No checkpoint for {thread_id}, fetching it again.", style="yellow")
+        return fetch_stage(thread_id)
+    print_step(f"Resuming {thread_id}")
+    reddit_object = record["result"]
+    claim(reddit_object["thread_id"])
+    return _rewrite_claimed(reddit_object, checkpoints)
+
+
+def _rewrite_claimed(reddit_object: dict, checkpoints: Checkpoints) -> dict:
+    """rewrite_stage for a claimed thread; releases the claim if it fails.
+
+    A failing fetch stage only hands its POST_ID to on_error, which can't
+    release a thread it never saw.
+    """
+    try:
+        return rewrite_stage(reddit_object, checkpoints)
+    except BaseException:
+        release(reddit_object["thread_id"])
+        raise
+
+
+def rewrite_stage(reddit_object: dict, checkpoints: Checkpoints) -> dict:
     # optional: nur im Story-Mode den Text einmalig umschreiben
-    if settings.config["settings"]["rewriter"]["enabled"]:
+    if not settings.config["settings"]["rewriter"]["enabled"]:
+        return reddit_object
+
+    def rewrite() -> dict:
         print("⟳ Rewriting story via OpenAI-Rewriter…")
-        reddit_object = rewrite_reddit(reddit_object)
-    redditid = id(reddit_object)
-    length, number_of_comments = save_text_to_mp3(reddit_object)
+        with metrics.span(reddit_object["thread_id"], "rewrite") as span:
+            span.add(api_calls=1)
+            return rewrite_reddit(reddit_object)
+
+    return checkpoints.run(
+        "rewrite",
+        fingerprint(reddit_object, settings.config["settings"]["rewriter"]),
+        rewrite,
+    )
+
+
+def prepare_stage(reddit_object: dict) -> dict:
+    """TTS, comment cards and the background clip of one thread.
+
+    Each step is checkpointed; its fingerprint includes the fingerprint of the
+    step before, so a redone step invalidates everything after it.
+    """
+    reddit_id = id(reddit_object)
+    _active_ids.add(reddit_id)
+    checkpoints = Checkpoints(reddit_id)
+    cfg = settings.config["settings"]
+
+    tts_fp = fingerprint(
+        reddit_object,
+        cfg["tts"],
+        cfg["storymode"],
+        cfg["storymodemethod"],
+        cfg.get("expand_abbreviations", False),
+        settings.config["reddit"]["thread"]["post_lang"],
+    )
+    length, number_of_comments = checkpoints.run(
+        "tts",
+        tts_fp,
+        lambda: list(save_text_to_mp3(reddit_object)),
+        outputs=[manifest_path(reddit_id)],
+    )
     length = math.ceil(length)
-    import re
-    reddit_id = re.sub(r"[^\w\s-]", "", reddit_object["thread_id"])
-    generate_comment_cards(reddit_object, f"assets/temp/{reddit_id}/png", number_of_comments)
-    bg_config = {
-        "video": get_background_config("video"),
-        "audio": get_background_config("audio"),
+
+    png_dir = f"assets/temp/{reddit_id}/png"
+    cards_fp = fingerprint(tts_fp, number_of_comments, cfg.get("thumbnail", {}))
+    checkpoints.run(
+        "cards",
+        cards_fp,
+        lambda: generate_comment_cards(reddit_object, png_dir, number_of_comments),
+        outputs=[f"{png_dir}/title.png"],
+    )
+
+    def background() -> dict:
+        bg_config = {
+            "video": get_background_config("video"),
+            "audio": get_background_config("audio"),
+        }
+        with _background_lock:
+            download_background_video(bg_config["video"])
+            download_background_audio(bg_config["audio"])
+        chop_background(bg_config, length, reddit_object)
+        return bg_config
+
+    bg_outputs = [f"assets/temp/{reddit_id}/background.mp4"]
+    if cfg["background"]["background_audio_volume"] != 0:
+        bg_outputs.append(f"assets/temp/{reddit_id}/background.mka")
+    bg_fp = fingerprint(length, cfg["background"])
+    bg_config = checkpoints.run("background", bg_fp, background, outputs=bg_outputs)
+
+    return {
+        "reddit_object": reddit_object,
+        "length": length,
+        "number_of_comments": number_of_comments,
+        "bg_config": bg_config,
+        "fingerprint": fingerprint(tts_fp, cards_fp, bg_fp),
     }
-    download_background_video(bg_config["video"])
-    download_background_audio(bg_config["audio"])
-    chop_background(bg_config, length, reddit_object)
-    make_final_video(number_of_comments, length, reddit_object, bg_config)
+
+
+def render_stage(job: dict) -> None:
+    """Renders the final video (captions are checkpointed inside). CPU-bound."""
+    reddit_object = job["reddit_object"]
+    checkpoints = Checkpoints(reddit_object["thread_id"])
+    render_fp = fingerprint(job["fingerprint"], settings.config["settings"])
+    status = "error"
+    try:
+        if checkpoints.is_done("render", render_fp):
+            print_substep("Video was already rendered, skipping.", style="bold blue")
+            status = "skipped"
+            return
+        video_path = make_final_video(
+            job["number_of_comments"], job["length"], reddit_object, job["bg_config"]
+        )
+        if checkpoints.path.parent.exists():  # nicht schon von cleanup() entfernt
+            checkpoints.complete("render", render_fp, outputs=[video_path])
+        status = "ok"
+    finally:
+        _active_ids.discard(re.sub(r"[^\w\s-]", "", reddit_object["thread_id"]))
+        release(reddit_object["thread_id"])
+        metrics.flush(reddit_object["thread_id"], status)
+
+
+def main(POST_ID=None, resume: str = None) -> None:
+    global redditid, reddit_object
+    reddit_object = resume_stage(resume) if resume else fetch_stage(POST_ID)
+    redditid = re.sub(r"[^\w\s-]", "", reddit_object["thread_id"])
+    try:
+        render_stage(prepare_stage(reddit_object))
+    except BaseException:
+        metrics.flush(redditid, "error")  # prepare failed: render_stage never flushed
+        raise
 
 
 def run_many(times) -> None:
@@ -75,16 +213,58 @@ def run_many(times) -> None:
         Popen("cls" if name == "nt" else "clear", shell=True).wait()
 
 
+def run_batch(post_ids: list, jobs: int, render_jobs: int = 1) -> None:
+    """Makes len(post_ids) videos with overlapping stages (None = pick a thread).
+
+    While one video renders, the next ones are fetched and synthesized.
+    jobs is the number of videos in TTS/card/background preparation at once.
+    """
+    print_step(f"Batch mode: {len(post_ids)} videos, {jobs} preparing, {render_jobs} rendering at once")
+    # erst nach check_toml importierbar (whisper_captions liest die Config beim Import)
+    from utils.whisper_captions import set_concurrent_jobs
+
+    set_concurrent_jobs(render_jobs)  # Whisper-Threads auf die parallelen Renders aufteilen
+
+    def on_error(stage: str, item, err: BaseException) -> None:
+        reddit_obj = item.get("reddit_object", item) if isinstance(item, dict) else None
+        thread_id = reddit_obj.get("thread_id") if reddit_obj else item
+        print_substep(f"{stage} failed for {thread_id or 'a new thread'}: {err}", style="bold red")
+        if reddit_obj:
+            reddit_id = re.sub(r"[^\w\s-]", "", reddit_obj["thread_id"])
+            _active_ids.discard(reddit_id)
+            cleanup(reddit_id)
+            release(reddit_obj["thread_id"])
+            metrics.flush(reddit_id, "error")
+
+    done = run_pipeline(
+        post_ids,
+        [
+            Stage("fetch", fetch_stage, 1),
+            Stage("prepare", prepare_stage, jobs),
+            Stage("render", render_stage, render_jobs),
+        ],
+        queue_size=jobs,
+        on_error=on_error,
+    )
+    print_step(f"Batch done: {done} of {len(post_ids)} videos made")
+
+
 def shutdown() -> NoReturn:
     if "redditid" in globals():
+        _active_ids.add(redditid)
+    if _active_ids:
         print_markdown("## Clearing temp files")
-        cleanup(redditid)
+        for reddit_id in list(_active_ids):
+            cleanup(reddit_id)
 
     print("Exiting...")
     sys.exit()
 
 
 if __name__ == "__main__":
+    print_banner()
+    checkversion(__VERSION__)
+
     # ---------------------------------------------------------------------
     #  CLI-Arguments
     # ---------------------------------------------------------------------
@@ -96,6 +276,24 @@ if __name__ == "__main__":
         default="config.toml",
         help="path to alternative config file (default: config.toml)",
     )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="batch mode: number of videos prepared (TTS, cards, background) at once "
+             "while others render (default: 1 = one video after another)",
+    )
+    parser.add_argument(
+        "--render-jobs",
+        type=int,
+        default=1,
+        help="batch mode: number of videos rendered at once (default: 1)",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="THREAD_ID",
+        help="continue a crashed/aborted video from its checkpoints in assets/temp/<THREAD_ID>/",
+    )
     args = parser.parse_args()
 
     if sys.version_info.major != 3 or sys.version_info.minor not in [10, 11]:
@@ -122,7 +320,15 @@ if __name__ == "__main__":
         )
         sys.exit()
     try:
-        if config["reddit"]["thread"]["post_id"]:
+        if args.resume:
+            main(resume=args.resume)
+        elif args.jobs > 1:
+            if config["reddit"]["thread"]["post_id"]:
+                batch = config["reddit"]["thread"]["post_id"].split("+")
+            else:
+                batch = [None] * max(1, int(config["settings"]["times_to_run"] or 1))
+            run_batch(batch, args.jobs, max(1, args.render_jobs))
+        elif config["reddit"]["thread"]["post_id"]:
             for index, post_id in enumerate(config["reddit"]["thread"]["post_id"].split("+")):
                 index += 1
                 print_step(
@@ -0,0 +1,126 @@
+"""
+One authenticated Reddit client per process.
+
+praw.Reddit is created on first use and reused by every call of
+get_subreddit_threads (retries, run_many, batch mode). The OAuth access token
+is written to video_creation/data/reddit_token.json whenever prawcore fetches
+a new one and put back into the authorizer on the next process start, so a
+run within the token's lifetime (1 h) doesn't need an auth round trip at all.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import praw
+from prawcore.exceptions import ResponseException
+
+from utils import settings
+from utils.checkpoint import fingerprint
+from utils.console import print_substep
+
+TOKEN_PATH = "./video_creation/data/reddit_token.json"
+TOKEN_MIN_TTL = 60  # seconds a stored token must still be valid to be reused
+
+_reddit: Optional[praw.Reddit] = None
+_reddit_lock = threading.Lock()
+
+
+def get_reddit() -> praw.Reddit:
+    """The process-wide Reddit client, logged in on first use."""
+    global _reddit
+    with _reddit_lock:
+        if _reddit is None:
+            _reddit = _login()
+        return _reddit
+
+
+def _login() -> praw.Reddit:
+    print_substep("Logging into Reddit.")
+
+    creds = settings.config["reddit"]["creds"]
+    if creds["2fa"]:
+        print("\nEnter your two-factor authentication code from your authenticator app.\n")
+        code = input("> ")
+        print()
+        passkey = f"{creds['password']}:{code}"
+    else:
+        passkey = creds["password"]
+    username = creds["username"]
+    if str(username).casefold().startswith("u/"):
+        username = username[2:]
+    try:
+        reddit = praw.Reddit(
+            client_id=creds["client_id"],
+            client_secret=creds["client_secret"],
+            user_agent="Accessing Reddit threads",
+            username=username,
+            passkey=passkey,
+            check_for_async=False,
+        )
+    except ResponseException as e:
+        if e.response.status_code == 401:
+            print("Invalid credentials - please check them in config.toml")
+        raise
+    except:
+        print("Something went wrong...")
+        raise
+
+    _persist_tokens(reddit, fingerprint(creds["client_id"], creds["client_secret"], username))
+    return reddit
+
+
+def _persist_tokens(reddit: praw.Reddit, key: str) -> None:
+    """Restores a stored access token and saves every newly fetched one.
+
+    Works on prawcore's authorizer (access_token / _expiration_timestamp); if
+    that ever changes, the client simply authenticates as before.
+    """
+    authorizer = getattr(getattr(reddit, "_core", None), "_authorizer", None)
+    if authorizer is None or not hasattr(authorizer, "refresh"):
+        return
+
+    stored = _load_token(key)
+    if stored:
+        authorizer.access_token = stored["access_token"]
+        authorizer._expiration_timestamp = stored["expires_at"]
+        authorizer.scopes = set(stored.get("scopes", []))
+
+    refresh = authorizer.refresh
+
+    def refresh_and_save():
+        refresh()
+        _save_token(
+            key,
+            {
+                "access_token": authorizer.access_token,
+                "expires_at": authorizer._expiration_timestamp,
+                "scopes": sorted(getattr(authorizer, "scopes", None) or []),
+            },
+        )
+
+    authorizer.refresh = refresh_and_save
+
+
+def _load_token(key: str) -> Optional[dict]:
+    try:
+        with open(TOKEN_PATH, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if stored.get("key") != key or stored.get("expires_at", 0) - TOKEN_MIN_TTL < time.time():
+        return None
+    return stored
+
+
+def _save_token(key: str, token: dict) -> None:
+    os.makedirs(os.path.dirname(TOKEN_PATH), exist_ok=True)
+    tmp = f"{TOKEN_PATH}.tmp"
+    # nur für den eigenen Benutzer lesbar – der Token ist ein Zugangsschlüssel
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"key": key, **token}, f)
+    os.replace(tmp, TOKEN_PATH)
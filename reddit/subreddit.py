@@ -1,55 +1,35 @@
 import re
 
-import praw
 from praw.models import MoreComments
-from prawcore.exceptions import ResponseException
 
+from reddit.client import get_reddit
+from TTS.engine_wrapper import DEFAULT_MAX_LENGTH
 from utils import settings
-from utils.ai_methods import sort_by_similarity
 from utils.console import print_step, print_substep
 from utils.posttextparser import posttextparser
 from utils.subreddit import get_subreddit_undone
-from utils.videos import check_done
+from utils.videos import check_done, claim, release
 from utils.voice import sanitize_text
 
+# Sprechtempo der TTS-Stimmen (~150 Wörter/min) – nur für die Schätzung, wann genug Kommentare da sind
+CHARS_PER_SECOND = 14
+# mehr holen als geschätzt: die TTS überspringt noch Kommentare, Stimmen sind unterschiedlich schnell
+SPEECH_BUDGET_MARGIN = 1.5
+
 
 def get_subreddit_threads(POST_ID: str):
     """
     Returns a list of threads from the AskReddit subreddit.
     """
 
-    print_substep("Logging into Reddit.")
-
+    reddit = get_reddit()
     content = {}
-    if settings.config["reddit"]["creds"]["2fa"]:
-        print("\nEnter your two-factor authentication code from your authenticator app.\n")
-        code = input("> ")
-        print()
-        pw = settings.config["reddit"]["creds"]["password"]
-        passkey = f"{pw}:{code}"
-    else:
-        passkey = settings.config["reddit"]["creds"]["password"]
-    username = settings.config["reddit"]["creds"]["username"]
-    if str(username).casefold().startswith("u/"):
-        username = username[2:]
-    try:
-        reddit = praw.Reddit(
-            client_id=settings.config["reddit"]["creds"]["client_id"],
-            client_secret=settings.config["reddit"]["creds"]["client_secret"],
-            user_agent="Accessing Reddit threads",
-            username=username,
-            passkey=passkey,
-            check_for_async=False,
-        )
-    except ResponseException as e:
-        if e.response.status_code == 401:
-            print("Invalid credentials - please check them in config.toml")
-    except:
-        print("Something went wrong...")
 
     # Ask user for subreddit input
     print_step("Getting subreddit threads...")
     similarity_score = 0
+    submission = threads = similarity_scores = None
+    claimed = False
     if not settings.config["reddit"]["thread"][
         "subreddit"
     ]:  # note to user. you can have multiple subreddits via reddit.subreddit("redditdev+learnpython")
@@ -70,14 +50,18 @@ def get_subreddit_threads(POST_ID: str):
         subreddit = reddit.subreddit(subreddit_choice)
 
     if POST_ID:  # would only be called if there are multiple queued posts
-        submission = reddit.submission(id=POST_ID)
+        submission = bound_comment_fetch(reddit.submission(id=POST_ID))
 
     elif (
         settings.config["reddit"]["thread"]["post_id"]
         and len(str(settings.config["reddit"]["thread"]["post_id"]).split("+")) == 1
     ):
-        submission = reddit.submission(id=settings.config["reddit"]["thread"]["post_id"])
+        submission = bound_comment_fetch(
+            reddit.submission(id=settings.config["reddit"]["thread"]["post_id"])
+        )
     elif settings.config["ai"]["ai_similarity_enabled"]:  # ai sorting based on comparison
+        from utils.ai_methods import sort_by_similarity  # torch/transformers only when needed
+
         threads = subreddit.hot(limit=50)
         keywords = settings.config["ai"]["ai_similarity_keywords"].split(",")
         keywords = [keyword.strip() for keyword in keywords]
@@ -85,22 +69,43 @@ def get_subreddit_threads(POST_ID: str):
         keywords_print = ", ".join(keywords)
         print(f"Sorting threads by similarity to the given keywords: {keywords_print}")
         threads, similarity_scores = sort_by_similarity(threads, keywords)
-        submission, similarity_score = get_subreddit_undone(
-            threads, subreddit, similarity_scores=similarity_scores
-        )
     else:
-        threads = subreddit.hot(limit=25)
-        submission = get_subreddit_undone(threads, subreddit)
-
-    if submission is None:
-        return get_subreddit_threads(POST_ID)  # submission already done. rerun
+        threads = list(subreddit.hot(limit=25))
+
+    explicit = bool(POST_ID or settings.config["reddit"]["thread"]["post_id"])
+    while True:
+        # pick (again) from the listing fetched above – a retry costs no new login or listing
+        if similarity_scores is not None:
+            submission, similarity_score = get_subreddit_undone(
+                threads, subreddit, similarity_scores=similarity_scores
+            )
+        elif threads is not None:
+            submission = get_subreddit_undone(threads, subreddit)
+
+        if submission is not None:
+            if not submission.num_comments and settings.config["settings"]["storymode"] == "false":
+                print_substep("No comments found. Skipping.")
+                exit()
+            submission = check_done(submission)  # double-checking
+        if submission is not None:
+            claimed = claim(submission.id)
+            if claimed or explicit:
+                break
+            print_substep("Another job picked this post in the meantime. Getting a new one.")
+        if threads is None:
+            return get_subreddit_threads(POST_ID)  # submission already done. rerun
 
-    elif not submission.num_comments and settings.config["settings"]["storymode"] == "false":
-        print_substep("No comments found. Skipping.")
-        exit()
+    try:
+        return _thread_content(submission, content, similarity_score)
+    except BaseException:
+        # Kommentare/Selftext nicht geladen → Thread für andere Batch-Jobs wieder freigeben
+        if claimed:
+            release(submission.id)
+        raise
 
-    submission = check_done(submission)  # double-checking
 
+def _thread_content(submission, content: dict, similarity_score: float) -> dict:
+    """Fills the reddit object of the picked submission (loads its comments or selftext)."""
     upvotes = submission.score
     ratio = submission.upvote_ratio * 100
     num_comments = submission.num_comments
@@ -136,36 +141,72 @@ def get_subreddit_threads(POST_ID: str):
         else:
             content["thread_post"] = submission.selftext
     else:
-        for top_level_comment in submission.comments:
-            if isinstance(top_level_comment, MoreComments):
-                continue
-
-            if top_level_comment.body in ["[removed]", "[deleted]"]:
-                continue  # # see https://github.com/JasonLovesDoggo/RedditVideoMakerBot/issues/78
-            if not top_level_comment.stickied:
-                sanitised = sanitize_text(top_level_comment.body)
-                if not sanitised or sanitised == " ":
-                    continue
-                if len(top_level_comment.body) <= int(
-                    settings.config["reddit"]["thread"]["max_comment_length"]
-                ):
-                    if len(top_level_comment.body) >= int(
-                        settings.config["reddit"]["thread"]["min_comment_length"]
-                    ):
-                        if (
-                            top_level_comment.author is not None
-                            and sanitize_text(top_level_comment.body) is not None
-                        ):  # if errors occur with this change to if not.
-                            content["comments"].append(
-                                {
-                                    "comment_body": top_level_comment.body,
-                                    "original_comment_body": top_level_comment.body,  # Keep original for comment cards
-                                    "comment_url": top_level_comment.permalink,
-                                    "comment_id": top_level_comment.id,
-                                    "comment_author": top_level_comment.author.name if top_level_comment.author else "Unknown",
-                                    "comment_score": top_level_comment.score,
-                                }
-                            )
+        content["comments"] = fetch_comments(submission)
 
     print_substep("Received subreddit threads successfully.", style="bold green")
     return content
+
+
+def bound_comment_fetch(submission):
+    """Applies comment_sort / comment_limit (top level only) to the submission's comment fetch.
+
+    Must happen before the first attribute access of a by-id submission: that
+    lazily loads the submission *with* its full comment tree.
+    """
+    thread_cfg = settings.config["reddit"]["thread"]
+    limit = int(thread_cfg.get("comment_limit", 0) or 0)
+    if limit and not getattr(submission, "_fetched", False):
+        submission.comment_sort = thread_cfg.get("comment_sort", "confidence")
+        submission.comment_limit = limit
+        submission.add_fetch_param("depth", 1)  # replies are never read
+    return submission
+
+
+def fetch_comments(submission) -> list:
+    """Top-level comments for the video, filtered while they stream in.
+
+    With settings.reddit.thread.comment_limit > 0 only that many top-level
+    comments are requested (sorted by comment_sort), and reading stops as soon
+    as the comments cover the estimated speech budget of the video
+    (TTSEngine stops after DEFAULT_MAX_LENGTH seconds anyway).
+    """
+    thread_cfg = settings.config["reddit"]["thread"]
+    limit = int(thread_cfg.get("comment_limit", 0) or 0)
+    max_length = int(thread_cfg["max_comment_length"])
+    min_length = int(thread_cfg["min_comment_length"])
+
+    bound_comment_fetch(submission)
+
+    budget = None
+    if limit:
+        budget = DEFAULT_MAX_LENGTH * CHARS_PER_SECOND * SPEECH_BUDGET_MARGIN - len(submission.title)
+
+    comments = []
+    for top_level_comment in submission.comments:
+        if isinstance(top_level_comment, MoreComments):
+            continue
+
+        if top_level_comment.body in ["[removed]", "[deleted]"]:
+            continue  # # see https://github.com/JasonLovesDoggo/RedditVideoMakerBot/issues/78
+        if top_level_comment.stickied or top_level_comment.author is None:
+            continue
+        if not min_length <= len(top_level_comment.body) <= max_length:
+            continue
+        sanitised = sanitize_text(top_level_comment.body)
+        if not sanitised or sanitised == " ":
+            continue
+        comments.append(
+            {
+                "comment_body": top_level_comment.body,
+                "original_comment_body": top_level_comment.body,  # Keep original for comment cards
+                "comment_url": top_level_comment.permalink,
+                "comment_id": top_level_comment.id,
+                "comment_author": top_level_comment.author.name,
+                "comment_score": top_level_comment.score,
+            }
+        )
+        if budget is not None:
+            budget -= len(sanitised)
+            if budget <= 0:
+                break
+    return comments
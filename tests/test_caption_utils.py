@@ -0,0 +1,47 @@
+import re
+import unittest
+
+from video_creation.caption_utils import _window_text
+
+HL, PRIM = "00FFFF", "FFFFFF"
+
+
+def _words(*spans):
+    words = [{"word": f"w{i}"} for i in range(len(spans))]
+    return words, list(spans)
+
+
+class WindowTextTest(unittest.TestCase):
+    def text(self, words, times, active, ev_start, karaoke=False):
+        window = range(len(words))
+        return _window_text(words, times, window, active, ev_start, HL, PRIM, 110, karaoke)
+
+    def test_first_word_is_highlighted_without_transform(self):
+        # Kokoro: ein Wort pro Event, das Wort beginnt mit dem Event
+        words, times = _words((1.0, 1.4))
+        text = self.text(words, times, range(0, 1), ev_start=1.0)
+        self.assertEqual(text, rf"{{\c&H{HL}&\fscx110\fscy110\t(400,400,\c&H{PRIM}&\fscx100\fscy100)}}w0")
+
+    def test_no_transform_ends_at_zero(self):
+        # \t(x,0,…) würde libass bis zum Event-Ende animieren lassen
+        words, times = _words((2.0, 2.0), (2.0, 2.3), (2.5, 2.9))
+        text = self.text(words, times, range(0, 3), ev_start=2.0)
+        self.assertNotRegex(text, r"\\t\(\d+,0,")
+        self.assertEqual(re.findall(r"\\t\((\d+),(\d+),", text), [("1", "1"), ("300", "300"), ("500", "500"), ("900", "900")])
+
+    def test_later_word_switches_on_at_its_start(self):
+        words, times = _words((0.0, 0.5), (0.6, 1.0))
+        text = self.text(words, times, range(0, 2), ev_start=0.0)
+        self.assertIn(rf"{{\t(600,600,\c&H{HL}&\fscx110\fscy110)\t(1000,1000,", text.split(" ")[1])
+
+    def test_karaoke_split_window_leaves_later_words_unfilled(self):
+        # Fenster w0..w3 über zwei Events verteilt, dieses Event spricht nur w1..w2
+        words, times = _words((0.0, 0.4), (0.5, 0.8), (0.8, 1.2), (1.3, 1.6))
+        text = self.text(words, times, range(1, 3), ev_start=0.5, karaoke=True)
+        self.assertEqual(text, r"{\k0}w0 {\kf30}w1 {\kf40}w2 {\k1}w3")
+        # w3 bekommt eine eigene Silbe, die erst nach dem Event-Ende (70 cs) anfängt
+        self.assertNotRegex(text, r"\\kf\d+\}w2 w3")
+
+
+if __name__ == "__main__":
+    unittest.main()
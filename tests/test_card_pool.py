@@ -0,0 +1,33 @@
+import importlib.util
+import os
+import runpy
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+REQUIRED = ("praw", "ffmpeg", "PIL", "pilmoji", "requests")
+
+
+def _import_main_as_worker() -> int:
+    """What a spawn/forkserver worker does with the parent's main.py; returns the checkversion calls."""
+    calls = []
+    with mock.patch("utils.version.checkversion", side_effect=lambda *args: calls.append(args)), \
+            mock.patch("requests.get", side_effect=AssertionError("network access on import")):
+        runpy.run_path(MAIN_PATH, run_name="__mp_main__")
+    return len(calls)
+
+
+@unittest.skipUnless(
+    all(importlib.util.find_spec(module) for module in REQUIRED), "needs the requirements.txt packages"
+)
+class CardPoolTest(unittest.TestCase):
+    def test_worker_does_not_check_the_version(self):
+        from video_creation.comment_card_renderer import _pool_context
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=_pool_context()) as pool:
+            self.assertEqual(pool.submit(_import_main_as_worker).result(timeout=120), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import importlib.util
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from utils import settings
+
+
+@unittest.skipUnless(importlib.util.find_spec("pilmoji"), "needs pilmoji")
+class EmojiSourceTest(unittest.TestCase):
+    def setUp(self):
+        from utils import emoji_source
+
+        self.module = emoji_source
+        self.tmp = Path(tempfile.mkdtemp())
+        self.config = settings.config
+        settings.config = {"settings": {"thumbnail": {}}}
+
+    def tearDown(self):
+        settings.config = self.config
+
+    def source(self, archive=None):
+        return self.module.LocalEmojiSource(self.tmp / "emoji", archive=archive)
+
+    def assert_no_http(self, source, emoji="😀"):
+        with mock.patch.object(self.module, "Twemoji") as cdn, \
+                mock.patch("urllib.request.urlopen", side_effect=AssertionError("HTTP request")):
+            self.assertIsNone(source.get_emoji(emoji))
+        cdn.assert_not_called()
+
+    def test_offline_missing_sprite_makes_no_request(self):
+        settings.config["settings"]["thumbnail"]["emoji_source"] = "offline"
+        self.assert_no_http(self.source())
+
+    def test_auto_is_offline_once_the_archive_exists(self):
+        archive = self.tmp / "emoji.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("72x72/1f44d.png", b"png")
+        source = self.source(archive)
+        self.assertEqual(source.get_emoji("👍").read(), b"png")
+        self.assert_no_http(source)
+
+    def test_auto_without_archive_uses_the_cdn(self):
+        with mock.patch.object(self.module, "Twemoji") as cdn:
+            cdn.return_value.get_emoji.return_value = mock.Mock(read=lambda: b"cdn")
+            self.assertEqual(self.source().get_emoji("😀").read(), b"cdn")
+        self.assertTrue((self.tmp / "emoji" / "1f600.png").is_file())
+
+    def test_a_miss_is_not_cached(self):
+        settings.config["settings"]["thumbnail"]["emoji_source"] = "offline"
+        source = self.source()
+        self.assertIsNone(source.get_emoji("🎉"))
+        (self.tmp / "emoji").mkdir(exist_ok=True)
+        (self.tmp / "emoji" / "1f389.png").write_bytes(b"later")
+        self.assertEqual(source.get_emoji("🎉").read(), b"later")
+
+
+if __name__ == "__main__":
+    unittest.main()
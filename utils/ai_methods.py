@@ -1,7 +1,21 @@
+import hashlib
+import threading
+
 import numpy as np
 import torch
 from transformers import AutoModel, AutoTokenizer
 
+from utils import settings
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Process-wide warm model + embedding caches: re-ranking (retries with other time
+# filters, batch mode) only embeds submissions/keywords that weren't seen before.
+_model = None
+_model_lock = threading.Lock()
+_thread_embeddings: dict = {}   # submission id → normalized embedding
+_keyword_embeddings: dict = {}  # keyword → normalized embedding
+
 
 # Mean Pooling - Take attention mask into account for correct averaging
 def mean_pooling(model_output, attention_mask):
@@ -12,53 +26,78 @@ def mean_pooling(model_output, attention_mask):
     )
 
 
-# This function sort the given threads based on their total similarity with the given keywords
-def sort_by_similarity(thread_objects, keywords):
-    # Initialize tokenizer + model.
-    tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-    model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+def get_model():
+    """Loads tokenizer + model once per process.
 
-    # Transform the generator to a list of Submission Objects, so we can sort later based on context similarity to
-    # keywords
-    thread_objects = list(thread_objects)
+    settings.ai.ai_similarity_backend:
+        torch  – the plain PyTorch model (default)
+        int8   – PyTorch with dynamically int8-quantized linear layers (CPU)
+        onnx   – ONNX Runtime via optimum (pip install optimum[onnxruntime])
+    """
+    global _model
+    with _model_lock:
+        if _model is None:
+            backend = settings.config["ai"].get("ai_similarity_backend", "torch")
+            tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+            if backend == "onnx":
+                from optimum.onnxruntime import ORTModelForFeatureExtraction
 
-    threads_sentences = []
-    for i, thread in enumerate(thread_objects):
-        threads_sentences.append(" ".join([thread.title, thread.selftext]))
+                model = ORTModelForFeatureExtraction.from_pretrained(MODEL_NAME, export=True)
+            else:
+                model = AutoModel.from_pretrained(MODEL_NAME).eval()
+                if backend == "int8":
+                    model = torch.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+            _model = (tokenizer, model)
+        return _model
 
-    # Threads inference
-    encoded_threads = tokenizer(
-        threads_sentences, padding=True, truncation=True, return_tensors="pt"
-    )
-    with torch.no_grad():
-        threads_embeddings = model(**encoded_threads)
-    threads_embeddings = mean_pooling(threads_embeddings, encoded_threads["attention_mask"])
 
-    # Keywords inference
-    encoded_keywords = tokenizer(keywords, padding=True, truncation=True, return_tensors="pt")
+def embed(sentences: list) -> np.ndarray:
+    """L2-normalized sentence embeddings, one row per sentence."""
+    tokenizer, model = get_model()
+    encoded = tokenizer(sentences, padding=True, truncation=True, return_tensors="pt")
     with torch.no_grad():
-        keywords_embeddings = model(**encoded_keywords)
-    keywords_embeddings = mean_pooling(keywords_embeddings, encoded_keywords["attention_mask"])
+        output = model(**encoded)
+    embeddings = mean_pooling(output, encoded["attention_mask"])
+    embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+    return embeddings.numpy()
+
+
+def _cached(cache: dict, keys: list, texts: list) -> np.ndarray:
+    missing = [i for i, key in enumerate(keys) if key not in cache]
+    if missing:
+        for i, row in zip(missing, embed([texts[i] for i in missing])):
+            cache[keys[i]] = row
+    return np.stack([cache[key] for key in keys])
+
+
+# This function sort the given threads based on their total similarity with the given keywords
+def sort_by_similarity(thread_objects, keywords):
+    # Transform the generator to a list of Submission Objects, so we can sort later based on context similarity to
+    # keywords
+    thread_objects = list(thread_objects)
+    if not thread_objects:
+        return thread_objects, np.zeros(0, dtype=np.float32)
 
-    # Compare every keyword w/ every thread embedding
-    threads_embeddings_tensor = torch.tensor(threads_embeddings)
-    total_scores = torch.zeros(threads_embeddings_tensor.shape[0])
-    cosine_similarity = torch.nn.CosineSimilarity()
-    for keyword_embedding in keywords_embeddings:
-        keyword_embedding = torch.tensor(keyword_embedding).repeat(
-            threads_embeddings_tensor.shape[0], 1
-        )
-        similarity = cosine_similarity(keyword_embedding, threads_embeddings_tensor)
-        total_scores += similarity
+    threads_sentences = [" ".join([thread.title, thread.selftext]) for thread in thread_objects]
+    thread_keys = [
+        getattr(thread, "id", None) or hashlib.sha256(sentence.encode("utf-8")).hexdigest()
+        for thread, sentence in zip(thread_objects, threads_sentences)
+    ]
 
-    similarity_scores, indices = torch.sort(total_scores, descending=True)
+    threads_embeddings = _cached(_thread_embeddings, thread_keys, threads_sentences)
+    keywords_embeddings = _cached(_keyword_embeddings, list(keywords), list(keywords))
 
-    threads_sentences = np.array(threads_sentences)[indices.numpy()]
+    # Sum of the cosine similarities to every keyword: one matrix multiply of normalized embeddings
+    total_scores = (threads_embeddings @ keywords_embeddings.T).sum(axis=1)
 
-    thread_objects = np.array(thread_objects)[indices.numpy()].tolist()
+    indices = np.argsort(-total_scores, kind="stable")
+    similarity_scores = total_scores[indices]
+    thread_objects = [thread_objects[i] for i in indices]
 
     # print('Similarity Thread Ranking')
     # for i, thread in enumerate(thread_objects):
-    #    print(f'{i}) {threads_sentences[i]} score {similarity_scores[i]}')
+    #    print(f'{i}) {threads_sentences[indices[i]]} score {similarity_scores[i]}')
 
     return thread_objects, similarity_scores
@@ -0,0 +1,160 @@
+# utils/aligned_captions.py
+# Benötigt:  pip install torch torchaudio   (sonst Fallback auf Whisper)
+"""
+Forced alignment of the narration text (caption_mode = "aligned").
+
+The text every clip was synthesized from is known (clip manifest, see
+TTSEngine), so instead of letting Whisper guess the words with a beam search
+the known words are aligned to each clip's audio with the MMS_FA CTC aligner
+of torchaudio. That is a single forward pass per clip, and the captions show
+exactly the words that were spoken – no misspellings.
+
+Produces the same [{word, start_time, end_time}, …] list as
+whisper_captions.transcribe_words, so build_ass_from_words renders it.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import unicodedata as ud
+from typing import Dict, List, Optional, Sequence
+
+from utils.clip_manifest import ClipManifest
+from utils.console import print_substep
+
+_aligner = None
+_aligner_lock = threading.Lock()
+
+
+def _load_aligner():
+    """(model, tokenizer, aligner, sample_rate, device) of torchaudio's MMS_FA bundle, loaded once."""
+    global _aligner
+    with _aligner_lock:
+        if _aligner is None:
+            import torch
+            import torchaudio
+
+            bundle = torchaudio.pipelines.MMS_FA
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = bundle.get_model(with_star=False).to(device).eval()
+            _aligner = (model, bundle.get_tokenizer(), bundle.get_aligner(), bundle.sample_rate, device)
+        return _aligner
+
+
+def _normalize(word: str) -> str:
+    """Spoken form for the MMS_FA dictionary: lowercase a-z and apostrophes."""
+    word = ud.normalize("NFKD", word.lower())
+    word = "".join(ch for ch in word if not ud.combining(ch)).replace("’", "'")
+    return re.sub(r"[^a-z']", "", word)
+
+
+def align_words(audio_path: str, text: str) -> Optional[List[Dict]]:
+    """Aligns the words of *text* to *audio_path*. Times are relative to the clip start.
+
+    Tokens without letters (numbers, dashes, emojis …) can't be aligned and are
+    appended to the previous word, like punctuation in build_ass. Returns None
+    if no token can be aligned (e.g. Cyrillic or CJK text after translation).
+    """
+    import torch
+    import torchaudio
+
+    model, tokenizer, aligner, sample_rate, device = _load_aligner()
+
+    shown: List[str] = []
+    spoken: List[str] = []
+    for token in text.split():
+        norm = _normalize(token)
+        if norm.strip("'"):
+            shown.append(token)
+            spoken.append(norm)
+        elif shown:
+            shown[-1] += f" {token}"
+    if not spoken:
+        return None
+
+    waveform, sr = torchaudio.load(audio_path)
+    waveform = waveform.mean(dim=0, keepdim=True)  # mono
+    if sr != sample_rate:
+        waveform = torchaudio.functional.resample(waveform, sr, sample_rate)
+
+    with torch.inference_mode():
+        emission, _ = model(waveform.to(device))
+        spans = aligner(emission[0], tokenizer(spoken))
+
+    seconds_per_frame = waveform.size(1) / emission.size(1) / sample_rate
+    return [
+        {
+            "word": word,
+            "start_time": word_spans[0].start * seconds_per_frame,
+            "end_time": word_spans[-1].end * seconds_per_frame,
+        }
+        for word, word_spans in zip(shown, spans)
+    ]
+
+
+def align_clips(
+    reddit_id: str,
+    clip_names: Sequence[str],
+    *,
+    skip_seconds: float = 0.0,
+) -> Optional[List[Dict]]:
+    """Aligns the clips in the order they are concatenated in the video.
+
+    Returns absolute word timings (clip offsets from the manifest durations),
+    or None if torchaudio isn't installed.
+    """
+    try:
+        _load_aligner()
+    except ImportError:
+        print_substep("torchaudio not installed – using Whisper transcription for captions.", style="yellow")
+        return None
+
+    manifest = ClipManifest.load(reddit_id)
+    words: List[Dict] = []
+    offset = 0.0
+    for name in clip_names:
+        clip = manifest.get(name)
+        try:
+            clip_words = align_words(clip["path"], clip["text"]) if clip.get("text") else None
+        except Exception as e:  # z. B. Audio nicht lesbar, Text länger als das Audio
+            print_substep(f"Alignment of {name} failed ({e}), transcribing it instead.", style="yellow")
+            clip_words = None
+        if clip_words is None:  # auch: kein Wort in a-z (kyrillisch, CJK … nach Übersetzung)
+            from utils.whisper_captions import transcribe_words
+
+            clip_words = transcribe_words(clip["path"])
+        for w in clip_words:
+            if offset + w["end_time"] <= skip_seconds:  # Titelteil überspringen
+                continue
+            words.append(
+                {
+                    "word": w["word"],
+                    "start_time": offset + w["start_time"],
+                    "end_time": offset + w["end_time"],
+                }
+            )
+        offset += float(clip["duration"])
+    return words
+
+
+def generate_aligned_ass(
+    audio_path: str,
+    *,
+    reddit_id: str,
+    clip_names: Sequence[str],
+    skip_seconds: float = 0.0,
+) -> str:
+    """
+    Vollpipeline:   Manifest-Text + Clips → Alignment → ASS
+    Ohne torchaudio: wie generate_whisper_ass über audio_path (erst dann geschrieben).
+    """
+    from utils.whisper_captions import build_ass_from_words, transcribe_words
+
+    words = align_clips(reddit_id, clip_names, skip_seconds=skip_seconds)
+    if words is None:
+        from video_creation.audio_utils import concat_audio_files
+
+        manifest = ClipManifest.load(reddit_id)
+        concat_audio_files([manifest.path(name) for name in clip_names], audio_path)
+        words = transcribe_words(audio_path, skip_seconds=skip_seconds)
+    return build_ass_from_words(words, out_path=f"assets/temp/{reddit_id}/aligned_captions.ass")
@@ -0,0 +1,163 @@
+"""
+Lightweight audio header parsing.
+
+Reads duration, sample rate, channel count and codec of the clips the TTS
+providers return without spawning ffprobe/moviepy: MP3 is parsed from its
+frame headers (Xing/Info/VBRI header if present, frame walk otherwise), WAV
+via the wave module. Anything else falls back to ffmpeg.probe.
+"""
+from __future__ import annotations
+
+import struct
+import wave
+from typing import Dict, Optional
+
+import ffmpeg
+
+# kbit/s, indexed by [version == 1][layer][bitrate index]
+_BITRATES = {
+    True: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    False: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_LAYERS = {3: 1, 2: 2, 1: 3}  # header bits → layer
+
+
+def _parse_frame_header(data: bytes, pos: int) -> Optional[Dict]:
+    if pos + 4 > len(data):
+        return None
+    (header,) = struct.unpack(">I", data[pos : pos + 4])
+    if header >> 21 != 0x7FF:
+        return None
+    version_bits = (header >> 19) & 3
+    layer = _LAYERS.get((header >> 17) & 3)
+    bitrate_idx = (header >> 12) & 0xF
+    sr_idx = (header >> 10) & 3
+    if version_bits == 1 or layer is None or bitrate_idx in (0, 15) or sr_idx == 3:
+        return None
+
+    mpeg1 = version_bits == 3
+    bitrate = _BITRATES[mpeg1][layer][bitrate_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sr_idx]
+    padding = (header >> 9) & 1
+    mono = (header >> 6) & 3 == 3
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or mpeg1) else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return {
+        "mpeg1": mpeg1,
+        "layer": layer,
+        "sample_rate": sample_rate,
+        "channels": 1 if mono else 2,
+        "samples": samples,
+        "length": length,
+    }
+
+
+def _skip_id3v2(data: bytes) -> int:
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = 0
+    for byte in data[6:10]:  # syncsafe integer
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _vbr_frame_count(data: bytes, pos: int, frame: Dict) -> Optional[int]:
+    """Frame count from a Xing/Info or VBRI header in the first frame, if present."""
+    if frame["mpeg1"]:
+        side_info = 17 if frame["channels"] == 1 else 32
+    else:
+        side_info = 9 if frame["channels"] == 1 else 17
+    xing = pos + 4 + side_info
+    if data[xing : xing + 4] in (b"Xing", b"Info"):
+        (flags,) = struct.unpack(">I", data[xing + 4 : xing + 8])
+        if flags & 1:
+            return struct.unpack(">I", data[xing + 8 : xing + 12])[0]
+    vbri = pos + 36
+    if data[vbri : vbri + 4] == b"VBRI":
+        return struct.unpack(">I", data[vbri + 14 : vbri + 18])[0]
+    return None
+
+
+def mp3_info(path: str) -> Optional[Dict]:
+    """Parses an MP3 file's frame headers. Returns None if no MPEG audio frame is found."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    pos = _skip_id3v2(data)
+    # find the first valid frame (tolerates junk between the tag and the audio)
+    while pos < len(data) - 4:
+        frame = _parse_frame_header(data, pos)
+        if frame and _parse_frame_header(data, pos + frame["length"]) is not None:
+            break
+        if frame and pos + frame["length"] == len(data):
+            break
+        pos = data.find(b"\xff", pos + 1)
+        if pos == -1:
+            return None
+    else:
+        return None
+
+    first = frame
+    frames = _vbr_frame_count(data, pos, first)
+    if frames is None:
+        frames = 0
+        while frame is not None:
+            frames += 1
+            pos += frame["length"]
+            frame = _parse_frame_header(data, pos)
+
+    return {
+        "duration": frames * first["samples"] / first["sample_rate"],
+        "sample_rate": first["sample_rate"],
+        "channels": first["channels"],
+        "codec": "mp3" if first["layer"] == 3 else f"mp{first['layer']}",
+    }
+
+
+def wav_info(path: str) -> Dict:
+    with wave.open(path, "rb") as w:
+        return {
+            "duration": w.getnframes() / w.getframerate(),
+            "sample_rate": w.getframerate(),
+            "channels": w.getnchannels(),
+            "codec": f"pcm_s{w.getsampwidth() * 8}le",
+        }
+
+
+def probe_audio(path: str) -> Dict:
+    """Returns {duration, sample_rate, channels, codec} of an audio file."""
+    with open(path, "rb") as f:
+        magic = f.read(12)
+    if magic[:4] == b"RIFF" and magic[8:12] == b"WAVE":
+        try:
+            return wav_info(path)
+        except (wave.Error, EOFError):
+            pass
+    elif magic[:3] == b"ID3" or magic[:1] == b"\xff":
+        info = mp3_info(path)
+        if info is not None:
+            return info
+
+    probe = ffmpeg.probe(path)
+    stream = next(s for s in probe["streams"] if s["codec_type"] == "audio")
+    return {
+        "duration": float(probe["format"].get("duration") or stream.get("duration") or 0.0),
+        "sample_rate": int(stream.get("sample_rate", 0)),
+        "channels": int(stream.get("channels", 0)),
+        "codec": stream.get("codec_name", ""),
+    }
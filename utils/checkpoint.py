@@ -0,0 +1,113 @@
+"""
+Per-thread stage checkpoints: assets/temp/<id>/checkpoints.json
+
+Every pipeline stage (fetch, rewrite, tts, cards, background, captions,
+render) records a fingerprint of its inputs, the files it produced and its
+(JSON) result once it has finished. When a job is run again – e.g. with
+`main.py --resume <thread_id>` after a crash – a stage whose fingerprint is
+unchanged and whose output files still exist is skipped and its stored result
+is returned, so only the failed stage and the ones after it run again.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from utils.console import print_substep
+
+_lock = threading.Lock()
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of JSON-serializable inputs (tuples and lists hash the same)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: str) -> Optional[str]:
+    """sha256 of a file's content (not its mtime: rebuilt but identical files match), None if missing."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+class Checkpoints:
+    """Completion records of one thread's stages."""
+
+    def __init__(self, thread_id: str):
+        self.reddit_id = re.sub(r"[^\w\s-]", "", thread_id)
+        self.path = Path(f"assets/temp/{self.reddit_id}/checkpoints.json")
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, records: Dict[str, Dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def record(self, stage: str) -> Optional[Dict]:
+        return self._load().get(stage)
+
+    def is_done(self, stage: str, fp: str) -> bool:
+        """True if the stage finished with these inputs and its outputs are still there."""
+        record = self.record(stage)
+        return (
+            record is not None
+            and record["fingerprint"] == fp
+            and all(os.path.exists(path) for path in record.get("outputs", []))
+        )
+
+    def complete(self, stage: str, fp: str, outputs: Iterable[str] = (), result: Any = None) -> None:
+        with _lock:
+            records = self._load()
+            records[stage] = {
+                "fingerprint": fp,
+                "outputs": list(outputs),
+                "result": result,
+                "time": int(time.time()),
+            }
+            self._save(records)
+
+    def invalidate(self, *stages: str) -> None:
+        with _lock:
+            records = self._load()
+            for stage in stages:
+                records.pop(stage, None)
+            self._save(records)
+
+    def run(
+        self,
+        stage: str,
+        fp: str,
+        func: Callable[[], Any],
+        outputs: Iterable[str] = (),
+    ) -> Any:
+        """Returns the stored result if the stage is done, otherwise runs func and records it.
+
+        func's return value must be JSON-serializable; it is what a skipped stage returns.
+        """
+        outputs = list(outputs)
+        if self.is_done(stage, fp):
+            print_substep(f"Skipping {stage}: already done for {self.reddit_id}", style="bold blue")
+            return self.record(stage)["result"]
+        result = func()
+        self.complete(stage, fp, outputs, result)
+        return result
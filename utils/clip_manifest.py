@@ -0,0 +1,55 @@
+"""
+Manifest of the TTS clips of one thread: assets/temp/<id>/manifest.json
+
+Written once by TTSEngine.run with the path, duration, sample rate, codec
+and the processed text of every clip, so the video and caption steps don't
+have to probe the MP3 files again.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, List, Optional
+
+from utils.audio_info import probe_audio
+
+
+def manifest_path(reddit_id: str) -> str:
+    return f"assets/temp/{reddit_id}/manifest.json"
+
+
+def write_manifest(reddit_id: str, clips: List[Dict]) -> str:
+    path = manifest_path(reddit_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"clips": clips}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+class ClipManifest:
+    """Clip lookup by name ("title", "0", "postaudio-3", ...)."""
+
+    def __init__(self, reddit_id: str, clips: Optional[List[Dict]] = None):
+        self.reddit_id = reddit_id
+        self.clips: Dict[str, Dict] = {clip["name"]: clip for clip in clips or []}
+
+    @classmethod
+    def load(cls, reddit_id: str) -> "ClipManifest":
+        """Loads the manifest. A missing manifest is not an error: clips are probed on demand."""
+        try:
+            with open(manifest_path(reddit_id), encoding="utf-8") as f:
+                return cls(reddit_id, json.load(f)["clips"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return cls(reddit_id)
+
+    def get(self, name: str) -> Dict:
+        if name not in self.clips:
+            path = f"assets/temp/{self.reddit_id}/mp3/{name}.mp3"
+            self.clips[name] = {"name": name, "path": path, "text": "", **probe_audio(path)}
+        return self.clips[name]
+
+    def duration(self, name: str) -> float:
+        return float(self.get(name)["duration"])
+
+    def path(self, name: str) -> str:
+        return self.get(name)["path"]
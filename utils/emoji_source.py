@@ -0,0 +1,198 @@
+"""
+Offline emoji source for Pilmoji.
+
+Pilmoji's default source downloads every emoji from a CDN while rendering.
+LocalEmojiSource reads the sprites from assets/emoji/ instead (Twemoji file
+naming: lowercase codepoints joined by "-", e.g. 1f600.png, 1f44d-1f3fd.png).
+The directory can be seeded from a bundled archive (assets/emoji.zip, any
+folder layout inside), and sprites are kept in a process-wide LRU so repeated
+emojis are memory reads.
+
+settings.thumbnail.emoji_source decides what happens to a sprite that is not
+available locally:
+
+    auto     – offline once assets/emoji.zip exists, cdn until then (default)
+    offline  – never touch the network, the emoji is drawn as text by Pilmoji
+    cdn      – download it once from Pilmoji's Twemoji CDN source and save it
+               to assets/emoji/, so the directory fills itself over time
+"""
+from __future__ import annotations
+
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from pilmoji.source import BaseSource, Twemoji
+
+from utils import settings
+
+EMOJI_DIR = Path("assets/emoji")
+EMOJI_ARCHIVE = Path("assets/emoji.zip")
+VS16 = "fe0f"  # variation selector, Twemoji drops it from most file names
+
+
+def sprite_names(emoji: str) -> list:
+    """Candidate file names of an emoji, e.g. "❤️" → ["2764-fe0f.png", "2764.png"]."""
+    codepoints = [f"{ord(ch):x}" for ch in emoji]
+    names = ["-".join(codepoints) + ".png"]
+    stripped = [cp for cp in codepoints if cp != VS16]
+    if stripped and stripped != codepoints:
+        names.append("-".join(stripped) + ".png")
+    return names
+
+
+class LocalEmojiSource(BaseSource):
+    """Pilmoji source backed by a local sprite directory and an optional seed archive."""
+
+    def __init__(self, directory: Path = EMOJI_DIR, archive: Optional[Path] = EMOJI_ARCHIVE):
+        self.directory = Path(directory)
+        self.archive = Path(archive) if archive else None
+        self._archive_index: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+        self._cdn: Optional[Twemoji] = None
+        if hasattr(os, "register_at_fork"):  # card render workers are forked (POSIX)
+            os.register_at_fork(
+                before=self._lock.acquire,
+                after_in_parent=self._lock.release,
+                after_in_child=self._after_fork_in_child,
+            )
+
+    # ───────────────────────────── Pilmoji API
+    def get_emoji(self, emoji: str, /) -> Optional[BytesIO]:
+        data = _sprite_bytes(self, emoji)
+        return BytesIO(data) if data is not None else None
+
+    def get_discord_emoji(self, id: int, /) -> Optional[BytesIO]:
+        # Discord-Emojis gibt es in Reddit-Texten nicht
+        return None
+
+    # ───────────────────────────── Sprites
+    def load(self, emoji: str) -> Optional[bytes]:
+        """Reads a sprite from the sprite directory, extracting it from the archive if needed."""
+        for name in sprite_names(emoji):
+            path = self.directory / name
+            if path.is_file():
+                return path.read_bytes()
+        for name in sprite_names(emoji):
+            data = self._from_archive(name)
+            if data is not None:
+                self._write_sprite(name, data)
+                return data
+        if self.offline():
+            return None
+        return self._download(emoji)
+
+    def offline(self) -> bool:
+        """True if missing sprites must not be downloaded (see settings.thumbnail.emoji_source)."""
+        try:
+            mode = settings.config["settings"]["thumbnail"].get("emoji_source", "auto")
+        except (TypeError, KeyError):  # config not loaded (e.g. a module used on its own)
+            mode = "auto"
+        if mode == "auto":
+            return self.archive is not None and self.archive.is_file()
+        return mode == "offline"
+
+    def _download(self, emoji: str) -> Optional[bytes]:
+        """Fetches a missing sprite from the CDN (like Pilmoji does by default) and keeps it."""
+        try:
+            if self._cdn is None:
+                self._cdn = Twemoji()
+            stream = self._cdn.get_emoji(emoji)
+        except Exception:  # kein Netz, CDN down … → Emoji wird als Text gezeichnet
+            return None
+        if stream is None:
+            return None
+        data = stream.read()
+        self._write_sprite(sprite_names(emoji)[0], data)
+        return data
+
+    def seed(self) -> int:
+        """Extracts every sprite of the archive into the sprite directory. Returns the count."""
+        count = 0
+        for name in self._index():
+            if not (self.directory / name).is_file():
+                data = self._from_archive(name)
+                if data is not None:
+                    self._write_sprite(name, data)
+                    count += 1
+        return count
+
+    def _index(self) -> Dict[str, str]:
+        """Maps sprite file names to their member names in the archive."""
+        with self._lock:
+            if self._archive_index is None:
+                self._archive_index = {}
+                if self.archive is not None and self.archive.is_file():
+                    with zipfile.ZipFile(self.archive) as zf:
+                        for member in zf.namelist():
+                            if member.lower().endswith(".png"):
+                                self._archive_index[os.path.basename(member).lower()] = member
+            return self._archive_index
+
+    def _from_archive(self, name: str) -> Optional[bytes]:
+        member = self._index().get(name)
+        if member is None:
+            return None
+        with zipfile.ZipFile(self.archive) as zf:
+            return zf.read(member)
+
+    def _write_sprite(self, name: str, data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f"{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, self.directory / name)
+
+    def _after_fork_in_child(self) -> None:
+        # the parent's lock was taken for the fork; the CDN session may be mid-request in a parent thread
+        self._lock = threading.Lock()
+        self._cdn = None
+
+    def __repr__(self) -> str:
+        return f"<LocalEmojiSource directory={str(self.directory)!r}>"
+
+
+SPRITE_CACHE_SIZE = 1024
+_sprites: "OrderedDict[Tuple[LocalEmojiSource, str], bytes]" = OrderedDict()
+_sprites_lock = threading.Lock()
+
+
+def _sprite_bytes(source: LocalEmojiSource, emoji: str) -> Optional[bytes]:
+    """Sprite from the process-wide LRU. Misses are not cached – the sprite may
+    be on disk by the next card (batch mode, a download that failed once)."""
+    key = (source, emoji)
+    with _sprites_lock:
+        data = _sprites.get(key)
+        if data is not None:
+            _sprites.move_to_end(key)
+            return data
+    data = source.load(emoji)
+    if data is not None:
+        with _sprites_lock:
+            _sprites[key] = data
+            if len(_sprites) > SPRITE_CACHE_SIZE:
+                _sprites.popitem(last=False)
+    return data
+
+
+def _reset_sprites_lock() -> None:
+    global _sprites_lock
+    _sprites_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):  # card render workers are forked (POSIX)
+    os.register_at_fork(
+        before=lambda: _sprites_lock.acquire(),
+        after_in_parent=lambda: _sprites_lock.release(),
+        after_in_child=_reset_sprites_lock,
+    )
+
+
+@lru_cache(maxsize=1)
+def emoji_source() -> LocalEmojiSource:
+    """The shared source; pass it to Pilmoji(image, source=emoji_source())."""
+    return LocalEmojiSource()
@@ -1,13 +1,108 @@
-from PIL.ImageFont import FreeTypeFont, ImageFont
+import os
+from functools import lru_cache
+from typing import Optional, Tuple
 
+import matplotlib.font_manager as fm
+from PIL import ImageFont
+from PIL.ImageFont import FreeTypeFont, ImageFont as BitmapFont
 
-def getsize(font: ImageFont | FreeTypeFont, text: str):
+from utils.console import print_step
+
+ROBOTO_REGULAR = os.path.join("fonts", "Roboto-Regular.ttf")
+ROBOTO_BOLD = os.path.join("fonts", "Roboto-Bold.ttf")
+
+# Stil-Suffix ("Inter-SemiBold", "Inter SemiBold") → matplotlib weight / style
+WEIGHT_MAP = {
+    "Bold": "bold", "SemiBold": "semibold", "Medium": "medium",
+    "Light": "light", "Thin": "ultralight", "Black": "black",
+    "ExtraBold": "heavy", "ExtraLight": "ultralight",
+    "Regular": "normal",
+}
+STYLE_MAP = {"Italic": "italic", "Oblique": "oblique"}
+# … und auf der 100-900 Skala für variable Fonts
+STYLE_TO_WEIGHT = {
+    "Thin": 100, "ExtraLight": 200, "Light": 300, "Regular": 400,
+    "Medium": 500, "SemiBold": 600, "Bold": 700, "ExtraBold": 800, "Black": 900,
+}
+
+
+def getsize(font: BitmapFont | FreeTypeFont, text: str):
     left, top, right, bottom = font.getbbox(text)
     width = right - left
     height = bottom - top
     return width, height
 
 
-def getheight(font: ImageFont | FreeTypeFont, text: str):
+def getheight(font: BitmapFont | FreeTypeFont, text: str):
     _, height = getsize(font, text)
     return height
+
+
+@lru_cache(maxsize=256)
+def get_font(path: str, size: int, weight: Optional[int] = None) -> FreeTypeFont:
+    """Loads a TrueType font once per (path, size, variation weight) and process.
+
+    The returned font is shared: don't call set_variation_* on it.
+    """
+    font = ImageFont.truetype(path, size)
+    if weight is not None and hasattr(font, "set_variation_by_axes"):
+        try:
+            font.set_variation_by_axes([weight])
+        except Exception:
+            # keine Variable-Font → Standardschnitt
+            pass
+    return font
+
+
+def load_font(path: str, size: int) -> BitmapFont | FreeTypeFont:
+    """get_font with PIL's default bitmap font as fallback if the file can't be loaded."""
+    try:
+        return get_font(path, size)
+    except OSError:
+        return _default_font()
+
+
+@lru_cache(maxsize=1)
+def _default_font() -> BitmapFont:
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=64)
+def resolve_system_font(family: str) -> Tuple[str, Optional[int]]:
+    """Finds a system font by name, e.g. "Arial", "Inter-SemiBold" or "Inter SemiBold".
+
+    Returns the font path and the variation weight to apply (None for static fonts).
+    The matplotlib font lookup runs once per family; unknown families fall back to
+    Roboto-Bold from ./fonts.
+    """
+    try:
+        return fm.findfont(fm.FontProperties(family=family), fallback_to_default=False), None
+    except Exception:
+        pass
+
+    if "-" in family or " " in family:
+        parts = family.split("-") if "-" in family else family.split(" ")
+        name = parts[0]
+        style = parts[1] if len(parts) > 1 else "Regular"
+
+        # Leerzeichen statt Bindestrich
+        try:
+            return fm.findfont(
+                fm.FontProperties(family=family.replace("-", " ")), fallback_to_default=False
+            ), None
+        except Exception:
+            pass
+
+        # Familie + weight/style Properties
+        try:
+            props = fm.FontProperties(family=name)
+            if style in WEIGHT_MAP:
+                props.set_weight(WEIGHT_MAP[style])
+            if style in STYLE_MAP:
+                props.set_style(STYLE_MAP[style])
+            return fm.findfont(props, fallback_to_default=False), STYLE_TO_WEIGHT.get(style)
+        except Exception:
+            pass
+
+    print_step(f"[yellow]Could not load system font \"{family}\" - falling back to Roboto.[/yellow]")
+    return ROBOTO_BOLD, None
@@ -0,0 +1,176 @@
+"""
+Per-stage timing spans and the run-metrics history.
+
+    with metrics.span(reddit_id, "tts") as span:
+        ...
+        span.add(api_calls=1)          # thread-safe, also from worker threads
+        span.add_files(*written_paths)
+
+Finished spans are collected per thread id. metrics.flush(reddit_id) (called
+once a video is rendered or has failed) appends them as one JSON line to
+video_creation/data/metrics.jsonl – next to the done-video store – and, if
+settings.metrics.prometheus_textfile is set, rewrites that file for the
+node_exporter textfile collector.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from utils import settings
+
+HISTORY_PATH = "./video_creation/data/metrics.jsonl"
+COUNTERS = ("bytes_written", "api_calls", "cache_hits")
+_COUNTER_HELP = {
+    "bytes_written": "Bytes written",
+    "api_calls": "Provider/API requests",
+    "cache_hits": "Cache hits",
+}
+
+_runs: Dict[str, List["Span"]] = {}
+_runs_lock = threading.Lock()
+_history_lock = threading.Lock()
+_videos_total: Dict[str, int] = {}  # status → count, for the Prometheus export
+
+
+def _enabled() -> bool:
+    try:
+        return bool(settings.config["settings"].get("metrics", {}).get("enabled", True))
+    except (TypeError, KeyError):  # config not loaded (e.g. a module used on its own)
+        return False
+
+
+def _clean(reddit_id: Optional[str]) -> Optional[str]:
+    return re.sub(r"[^\w\s-]", "", reddit_id) if reddit_id else None
+
+
+class Span:
+    """One timed stage of one video."""
+
+    def __init__(self, reddit_id: Optional[str], name: str, **attrs):
+        self.reddit_id = reddit_id  # may be set inside the span (fetch only knows it at the end)
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.status = "ok"
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, *, bytes_written: int = 0, api_calls: int = 0, cache_hits: int = 0) -> None:
+        with self._lock:
+            self.counters["bytes_written"] += bytes_written
+            self.counters["api_calls"] += api_calls
+            self.counters["cache_hits"] += cache_hits
+
+    def add_files(self, *paths: str) -> None:
+        """Counts the size of the given files (directories: all files in them) as written."""
+        total = 0
+        for path in paths:
+            if not path:
+                continue
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+            elif os.path.exists(path):
+                total += os.path.getsize(path)
+        self.add(bytes_written=total)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "start": round(self.start, 3),
+            "end": round(self.end, 3) if self.end else None,
+            "duration_s": round((self.end or time.time()) - self.start, 3),
+            "status": self.status,
+            **self.counters,
+            **self.attrs,
+        }
+
+
+@contextmanager
+def span(reddit_id: Optional[str], name: str, **attrs) -> Iterator[Span]:
+    """Times the block as stage *name* of the video *reddit_id*."""
+    current = Span(reddit_id, name, **attrs)
+    try:
+        yield current
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        current.end = time.time()
+        reddit_id = _clean(current.reddit_id)
+        if reddit_id and _enabled():
+            with _runs_lock:
+                _runs.setdefault(reddit_id, []).append(current)
+
+
+def flush(reddit_id: str, status: str = "ok") -> Optional[Dict]:
+    """Appends the spans of a finished (or failed) video to the history. None if there were none."""
+    reddit_id = _clean(reddit_id)
+    with _runs_lock:
+        spans = _runs.pop(reddit_id, None)
+    if not spans or not _enabled():
+        return None
+
+    record = {
+        "thread_id": reddit_id,
+        "status": status,
+        "start": round(min(s.start for s in spans), 3),
+        "end": round(max(s.end for s in spans), 3),
+        "spans": [s.to_dict() for s in spans],
+    }
+    record["wall_s"] = round(record["end"] - record["start"], 3)
+    for counter in COUNTERS:
+        record[counter] = sum(s.counters[counter] for s in spans)
+
+    with _history_lock:
+        os.makedirs(os.path.dirname(HISTORY_PATH), exist_ok=True)
+        with open(HISTORY_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        _videos_total[status] = _videos_total.get(status, 0) + 1
+        textfile = settings.config["settings"].get("metrics", {}).get("prometheus_textfile")
+        if textfile:
+            write_prometheus(textfile, record)
+    return record
+
+
+def write_prometheus(path: str, record: Dict) -> None:
+    """node_exporter textfile: stage gauges of the last video + videos made by this process."""
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples: List[tuple]) -> None:
+        lines.append(f"# HELP rvmb_{name} {help_text}")
+        lines.append(f"# TYPE rvmb_{name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"rvmb_{name}{{{label_str}}} {value}" if label_str else f"rvmb_{name} {value}")
+
+    stages: Dict[str, Dict] = {}
+    for s in record["spans"]:  # a stage that ran twice (e.g. parts) is summed up
+        stage = stages.setdefault(s["name"], dict.fromkeys(("duration_s", *COUNTERS), 0))
+        for key in stage:
+            stage[key] += s[key]
+
+    metric("stage_duration_seconds", "gauge", "Wall time of each stage of the last video.",
+           [({"stage": name}, v["duration_s"]) for name, v in stages.items()])
+    for counter in COUNTERS:
+        metric(f"stage_{counter}", "gauge", f"{_COUNTER_HELP[counter]} of each stage of the last video.",
+               [({"stage": name}, v[counter]) for name, v in stages.items()])
+    metric("video_duration_seconds", "gauge", "Wall time of the last video, first to last stage.",
+           [({}, record["wall_s"])])
+    metric("last_video_timestamp_seconds", "gauge", "When the last video finished.", [({}, record["end"])])
+    metric("videos_total", "counter", "Videos finished by this process.",
+           [({"status": status}, count) for status, count in _videos_total.items()])
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"  # the collector must never see a half-written file
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
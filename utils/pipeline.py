@@ -0,0 +1,96 @@
+"""
+Staged batch processing.
+
+Every stage has its own pool of worker threads; stages are connected by
+bounded queues, so an item moves on as soon as its stage is done while the
+next item already occupies the previous stage (e.g. the next thread is fetched
+and synthesized while the current one renders). A full queue blocks the
+stage in front of it, which keeps at most `queue_size` finished-but-waiting
+items between two stages.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import traceback
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional
+
+from utils.console import print_substep
+
+_DONE = object()  # sentinel: the previous stage has no more items
+
+
+class Stage(NamedTuple):
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+def run_pipeline(
+    items: Iterable,
+    stages: List[Stage],
+    queue_size: int = 1,
+    on_error: Optional[Callable[[str, Any, BaseException], None]] = None,
+) -> int:
+    """Runs every item through all stages. Returns the number of items that finished.
+
+    An exception drops the item (after on_error(stage_name, item, exc)); the
+    other items continue.
+    """
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+    workers = [max(1, stage.workers) for stage in stages]
+    finished = 0
+    finished_lock = threading.Lock()
+
+    def feed():
+        for item in items:
+            queues[0].put(item)
+        for _ in range(workers[0]):
+            queues[0].put(_DONE)
+
+    def work(index: int, stage: Stage, remaining: list, lock: threading.Lock):
+        nonlocal finished
+        last = index == len(stages) - 1
+        while True:
+            item = queues[index].get()
+            if item is _DONE:
+                break
+            try:
+                result = stage.func(item)
+            except BaseException as e:  # noqa: B902 – auch SystemExit aus exit() in den Stages
+                if on_error is not None:
+                    on_error(stage.name, item, e)
+                else:
+                    print_substep(f"{stage.name} failed: {e}", style="bold red")
+                    traceback.print_exc()
+                continue
+            if last:
+                with finished_lock:
+                    finished += 1
+            else:
+                queues[index + 1].put(result)
+        # der letzte Worker einer Stage beendet die nächste
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0 and not last:
+                for _ in range(workers[index + 1]):
+                    queues[index + 1].put(_DONE)
+
+    threads = [threading.Thread(target=feed, name="pipeline-feed", daemon=True)]
+    for index, stage in enumerate(stages):
+        remaining = [workers[index]]
+        lock = threading.Lock()
+        for n in range(remaining[0]):
+            threads.append(
+                threading.Thread(
+                    target=work,
+                    args=(index, stage, remaining, lock),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True,
+                )
+            )
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return finished
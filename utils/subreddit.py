@@ -1,9 +1,6 @@
-import json
-from os.path import exists
-
 from utils import settings
-from utils.ai_methods import sort_by_similarity
 from utils.console import print_substep
+from utils.videos import in_progress, is_done
 
 
 def get_subreddit_undone(submissions: list, subreddit, times_checked=0, similarity_scores=None):
@@ -19,18 +16,16 @@ def get_subreddit_undone(submissions: list, subreddit, times_checked=0, similari
     # Second try of getting a valid Submission
     if times_checked and settings.config["ai"]["ai_similarity_enabled"]:
         print("Sorting based on similarity for a different date filter and thread limit..")
-        submissions = sort_by_similarity(
-            submissions, keywords=settings.config["ai"]["ai_similarity_enabled"]
-        )
+        from utils.ai_methods import sort_by_similarity  # torch/transformers only when needed
+
+        keywords = [
+            keyword.strip() for keyword in settings.config["ai"]["ai_similarity_keywords"].split(",")
+        ]
+        submissions, similarity_scores = sort_by_similarity(submissions, keywords=keywords)
 
     # recursively checks if the top submission in the list was already done.
-    if not exists("./video_creation/data/videos.json"):
-        with open("./video_creation/data/videos.json", "w+") as f:
-            json.dump([], f)
-    with open("./video_creation/data/videos.json", "r", encoding="utf-8") as done_vids_raw:
-        done_videos = json.load(done_vids_raw)
     for i, submission in enumerate(submissions):
-        if already_done(done_videos, submission):
+        if already_done(submission):
             continue
         if submission.over_18:
             try:
@@ -93,18 +88,13 @@ def get_subreddit_undone(submissions: list, subreddit, times_checked=0, similari
     )  # all the videos in hot have already been done
 
 
-def already_done(done_videos: list, submission) -> bool:
-    """Checks to see if the given submission is in the list of videos
+def already_done(submission) -> bool:
+    """Checks to see if the given submission is in the done-video store
 
     Args:
-        done_videos (list): Finished videos
         submission (Any): The submission
 
     Returns:
-        Boolean: Whether the video was found in the list
+        Boolean: Whether the video was already made (or is being made by another job)
     """
-
-    for video in done_videos:
-        if video["id"] == str(submission):
-            return True
-    return False
+    return in_progress(str(submission)) or is_done(str(submission))
@@ -1,10 +1,144 @@
 import json
+import os
+import sqlite3
+import threading
 import time
+from typing import Dict, List, Optional
 
 from praw.models import Submission
 
 from utils import settings
-from utils.console import print_step
+from utils.console import print_step, print_substep
+
+DB_PATH = "./video_creation/data/videos.db"
+LEGACY_JSON_PATH = "./video_creation/data/videos.json"
+
+COLUMNS = (
+    "subreddit",
+    "id",
+    "time",
+    "background_credit",
+    "reddit_title",
+    "filename",
+    "author",
+    "upvotes",
+    "num_comments",
+    "ai_caption",
+)
+_INSERT = (
+    f"INSERT OR IGNORE INTO videos ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join(':' + column for column in COLUMNS)})"
+)
+
+# ids of threads a running job is working on (batch mode: not in the done store yet)
+_in_progress: set = set()
+_in_progress_lock = threading.Lock()
+_local = threading.local()  # one sqlite connection per thread
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def claim(reddit_id: str) -> bool:
+    """Marks a thread as being worked on. Returns False if another job already claimed it."""
+    with _in_progress_lock:
+        if reddit_id in _in_progress:
+            return False
+        _in_progress.add(reddit_id)
+        return True
+
+
+def release(reddit_id: str) -> None:
+    with _in_progress_lock:
+        _in_progress.discard(reddit_id)
+
+
+def in_progress(reddit_id: str) -> bool:
+    with _in_progress_lock:
+        return reddit_id in _in_progress
+
+
+def _connect() -> sqlite3.Connection:
+    """The calling thread's connection to the done-video store (created + migrated on first use).
+
+    SQLite does the file locking, so several processes (e.g. two main.py runs)
+    can check and save at the same time; WAL keeps readers from blocking the writer.
+    """
+    global _initialized
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        _local.conn = conn
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                with conn:
+                    conn.execute(
+                        """CREATE TABLE IF NOT EXISTS videos (
+                            id TEXT PRIMARY KEY,
+                            subreddit TEXT,
+                            time TEXT,
+                            background_credit TEXT,
+                            reddit_title TEXT,
+                            filename TEXT,
+                            author TEXT,
+                            upvotes INTEGER,
+                            num_comments INTEGER,
+                            ai_caption TEXT
+                        )"""
+                    )
+                _migrate_json(conn)
+                _initialized = True
+    return conn
+
+
+def _migrate_json(conn: sqlite3.Connection) -> None:
+    """Imports the old videos.json once and renames it, so the ids aren't rendered again."""
+    if not os.path.exists(LEGACY_JSON_PATH):
+        return
+    try:
+        with open(LEGACY_JSON_PATH, "r", encoding="utf-8") as raw_vids:
+            done_vids = json.load(raw_vids)
+    except json.JSONDecodeError:
+        print_substep(f"{LEGACY_JSON_PATH} is not valid JSON, not migrating it.", style="red")
+        return
+    with conn:
+        conn.executemany(
+            _INSERT,
+            [{column: video.get(column) for column in COLUMNS} for video in done_vids if video.get("id")],
+        )
+    os.replace(LEGACY_JSON_PATH, LEGACY_JSON_PATH + ".migrated")
+    print_substep(f"Migrated {len(done_vids)} videos from videos.json to {DB_PATH}", style="bold blue")
+
+
+def is_done(reddit_id: str) -> bool:
+    """Whether a video of this thread has been generated (primary-key lookup)."""
+    return (
+        _connect().execute("SELECT 1 FROM videos WHERE id = ?", (str(reddit_id),)).fetchone()
+        is not None
+    )
+
+
+def done_videos() -> List[Dict]:
+    """All generated videos in the order they were saved, as the dicts videos.json used to hold."""
+    rows = _connect().execute(f"SELECT {', '.join(COLUMNS)} FROM videos ORDER BY rowid")
+    return [dict(row) for row in rows]
+
+
+def export_json(path: Optional[str] = None) -> List[Dict]:
+    """JSON export of the store for the GUI (and anything else that read videos.json).
+
+    Returns the list; if *path* is given it is also written there.
+    """
+    videos = done_videos()
+    if path:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(videos, f, ensure_ascii=False, indent=4)
+        os.replace(tmp, path)
+    return videos
 
 
 def check_done(
@@ -19,17 +153,14 @@ def check_done(
     Returns:
         Submission|None: Reddit object in args
     """
-    with open("./video_creation/data/videos.json", "r", encoding="utf-8") as done_vids_raw:
-        done_videos = json.load(done_vids_raw)
-    for video in done_videos:
-        if video["id"] == str(redditobj):
-            if settings.config["reddit"]["thread"]["post_id"]:
-                print_step(
-                    "You already have done this video but since it was declared specifically in the config file the program will continue"
-                )
-                return redditobj
-            print_step("Getting new post as the current one has already been done")
-            return None
+    if is_done(str(redditobj)):
+        if settings.config["reddit"]["thread"]["post_id"]:
+            print_step(
+                "You already have done this video but since it was declared specifically in the config file the program will continue"
+            )
+            return redditobj
+        print_step("Getting new post as the current one has already been done")
+        return None
     return redditobj
 
 
@@ -44,7 +175,7 @@ def save_data(
     num_comments: int,
     ai_caption: str = ""
 ):
-    """Saves the videos that have already been generated to a JSON file in video_creation/data/videos.json
+    """Saves the videos that have already been generated to video_creation/data/videos.db
 
     Args:
         subreddit (str): Name of the subreddit
@@ -57,31 +188,20 @@ def save_data(
         num_comments (int): Number of comments read
         ai_caption (str): Optional AI-generated social caption
     """
-    path = "./video_creation/data/videos.json"
-    # Open file for read+write, update in-memory list, then overwrite & truncate
-    with open(path, "r+", encoding="utf-8") as raw_vids:
-        done_vids = json.load(raw_vids)
-
+    payload = {
+        "subreddit": subreddit,
+        "id": reddit_id,
+        "time": str(int(time.time())),
+        "background_credit": credit,
+        "reddit_title": reddit_title,
+        "filename": filename,
+        "author": author,
+        "upvotes": upvotes,
+        "num_comments": num_comments,
+        "ai_caption": ai_caption,
+    }
+    conn = _connect()
+    with conn:
         # If this reddit_id already exists, do nothing
-        if reddit_id in [video["id"] for video in done_vids]:
-            return  # video already done but was specified to continue anyway in the config file
-
-        # Build payload including new ai_caption field
-        payload = {
-            "subreddit": subreddit,
-            "id": reddit_id,
-            "time": str(int(time.time())),
-            "background_credit": credit,
-            "reddit_title": reddit_title,
-            "filename": filename,
-            "author": author,
-            "upvotes": upvotes,
-            "num_comments": num_comments,
-            "ai_caption": ai_caption,  # newly added
-        }
-        done_vids.append(payload)
-
-        # Write back and truncate to remove any leftover data
-        raw_vids.seek(0)
-        json.dump(done_vids, raw_vids, ensure_ascii=False, indent=4)
-        raw_vids.truncate()
+        # (video already done but was specified to continue anyway in the config file)
+        conn.execute(_INSERT, payload)
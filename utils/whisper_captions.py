@@ -2,14 +2,79 @@
 # Benötigt:  pip install faster-whisper
 
 from __future__ import annotations
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from itertools import islice
-from typing  import List, Dict
-
-from faster_whisper import WhisperModel
+from typing  import List, Dict, Sequence, Tuple
 
 from utils import settings
-from video_creation.caption_utils import _hex_to_ass, _ass_time, ASS_HEAD
+from video_creation.caption_utils import write_caption_ass
+
+
+# ═══════════════════ 0)  Modell-Pool ════════════════════════════════════════════
+# Ein geladenes Modell pro (size, device, compute_type) und Prozess – im Batch-
+# Betrieb zahlt nur das erste Video die Ladezeit.
+_models: Dict[Tuple[str, str, str], "WhisperModel"] = {}
+_models_lock = threading.Lock()
+_concurrent_jobs = 1
+
+
+def set_concurrent_jobs(jobs: int) -> None:
+    """Number of videos that may transcribe at the same time (batch mode).
+
+    Must be called before the first model is loaded: the CPU threads are split
+    between them and the model gets one worker per job.
+    """
+    global _concurrent_jobs
+    _concurrent_jobs = max(1, int(jobs))
+
+
+@lru_cache(maxsize=1)
+def detect_device() -> Tuple[str, str]:
+    """(device, compute_type) – via CTranslate2 (ships with faster-whisper), no torch needed."""
+    import ctranslate2
+
+    try:
+        if ctranslate2.get_cuda_device_count() > 0:
+            return "cuda", "float16"  # NVIDIA GPU
+    except Exception:
+        pass
+    # CPU (Intel/AMD/Apple Silicon): int8 ist überall am schnellsten
+    return "cpu", "int8"
+
+
+def cpu_threads() -> int:
+    """Threads per transcription: the configured value, or the available cores split between jobs."""
+    configured = int(settings.config["settings"]["captions"].get("whisper_cpu_threads", 0) or 0)
+    if configured > 0:
+        return configured
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # Windows / macOS
+        cores = os.cpu_count() or 1
+    return max(1, cores // _concurrent_jobs)
+
+
+def get_model(model_size: str = None):
+    """Returns the cached WhisperModel for the configured size and detected hardware."""
+    from faster_whisper import WhisperModel
+
+    if model_size is None:
+        model_size = settings.config["settings"]["captions"].get("whisper_model_size", "base")
+    device, compute_type = detect_device()
+    key = (model_size, device, compute_type)
+    with _models_lock:
+        if key not in _models:
+            _models[key] = WhisperModel(
+                model_size,
+                device=device,
+                compute_type=compute_type,
+                num_workers=_concurrent_jobs,  # parallele transcribe()-Aufrufe aus mehreren Threads
+                cpu_threads=cpu_threads() if device == "cpu" else 0,
+            )
+        return _models[key]
 
 
 # ═══════════════════ 1)  Audio → Wort-Timings ═══════════════════════════════════
@@ -26,36 +91,8 @@ def transcribe_words(
     
     Optimierte Whisper-Einstellungen für bessere Transkriptionsgenauigkeit.
     """
-    # Model size aus config laden falls nicht gesetzt
-    if model_size is None:
-        model_size = settings.config["settings"]["captions"].get("whisper_model_size", "base")
-    
-    # Hardware-optimierte Whisper-Konfiguration
-    import platform
-    import torch
-    
-    # Auto-detect beste Hardware-Beschleunigung
-    if torch.cuda.is_available():
-        device = "cuda"
-        compute_type = "float16"  # NVIDIA GPU
-    elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-        device = "cpu"  # MPS nicht direkt unterstützt, aber CPU auf M1/M2 ist sehr schnell
-        compute_type = "int8"   # Optimiert für Apple Silicon
-    elif platform.processor() == 'arm':  # Apple Silicon
-        device = "cpu"
-        compute_type = "int8"   # Optimal für M1/M2/M3
-    else:
-        device = "cpu" 
-        compute_type = "int8"   # Intel/AMD CPU
-    
-    model = WhisperModel(
-        model_size, 
-        device=device, 
-        compute_type=compute_type,
-        num_workers=1,                   # Konsistentere Ergebnisse
-        cpu_threads=4 if device == "cpu" else 0  # Optimiert für Multi-Core
-    )
-    
+    model = get_model(model_size)
+
     # Optimierte Transkriptionsparameter
     segments, _ = model.transcribe(
         audio_path, 
@@ -87,6 +124,29 @@ def transcribe_words(
     return words
 
 
+def transcribe_many(
+    audio_paths  : Sequence[str],
+    *,
+    model_size   : str = None,
+    skip_seconds : float | Sequence[float] = 0.0,
+) -> List[List[Dict]]:
+    """
+    Batch-Variante von transcribe_words: alle Dateien (z. B. die audio.wav mehrerer
+    Videos) teilen sich ein Modell; bis zu set_concurrent_jobs() laufen parallel.
+    Ergebnis in derselben Reihenfolge wie audio_paths.
+    """
+    if isinstance(skip_seconds, (int, float)):
+        skip_seconds = [float(skip_seconds)] * len(audio_paths)
+    get_model(model_size)  # einmal laden, bevor die Threads starten
+    with ThreadPoolExecutor(max_workers=_concurrent_jobs, thread_name_prefix="whisper") as pool:
+        return list(
+            pool.map(
+                lambda job: transcribe_words(job[0], model_size=model_size, skip_seconds=job[1]),
+                zip(audio_paths, skip_seconds),
+            )
+        )
+
+
 # ═══════════════════ 2)  Wort-Timings → ASS ═════════════════════════════════════
 def build_ass_from_words(
     words    : List[Dict],
@@ -98,60 +158,21 @@ def build_ass_from_words(
     Erstellt eine ASS-Datei mit Highlight-Wort:
       • Fenstergröße = cfg['words_per_caption']
       • Letzte Caption bleibt sichtbar, solange die Pause < pause_threshold ist
+      • Ein Event pro Fenster (caption_utils.write_caption_ass), linear in der Wortzahl
     """
-    font        = cfg["captions_font_family"]
-    size        = cfg["captions_font_size"]
-    color       = cfg["captions_color"]
-    hlcol       = cfg["captions_highlight_color"]
-    outline_px  = cfg.get("captions_outline_px", 2)
-    shadow_px   = cfg.get("captions_shadow_px", 1)
-    window_size = cfg.get("words_per_caption", 6)
-    pause_thr   = cfg.get("pause_threshold", 1.0)
-    big         = int(size * 1)
-
-    primary   = f"&H00{_hex_to_ass(color)}"
-    secondary = f"&H00{_hex_to_ass(hlcol)}"
-    outline_c = "&H00000000"
-    back_c    = "&H00000000"
-
-    style = (
-        f"Style: koko,{font},{size},{primary},{secondary},"
-        f"{outline_c},{back_c},0,0,0,1,{outline_px},{shadow_px},5,0,0,40,1"
-    )
-
-    events: list[str] = []
-    for idx, w in enumerate(words):
-        # ------- Fenster bestimmen ------------------------------------------
-        base   = max(0, idx - (idx % window_size))
-        window = list(islice(words, base, base + window_size))
-
-        # ------- Timings ----------------------------------------------------
-        start_s = w["start_time"]
-
-        if idx + 1 < len(words):
-            next_start = words[idx + 1]["start_time"]
-            if next_start - w["end_time"] <= pause_thr:
-                end_s = max(start_s + 0.05, next_start)      # Caption bleibt stehen
-            else:
-                end_s = w["end_time"]                        # lange Pause → ausblenden
-        else:
-            end_s = w["end_time"]
-
-        # ------- Text mit Highlight -----------------------------------------
-        parts = []
-        for tok in window:
-            txt = tok["word"]
-            if tok is w:
-                txt = rf"{{\b1\fs{big}\c&H{_hex_to_ass(hlcol)}&}}{txt}{{\r}}"
-            parts.append(txt)
-
-        events.append(
-            f"Dialogue: 0,{_ass_time(start_s)},{_ass_time(end_s)},koko,{' '.join(parts)}"
-        )
-
-    Path(out_path).write_text(
-        ASS_HEAD.format(style=style) + "\n".join(events),
-        encoding="utf-8",
+    write_caption_ass(
+        [words],
+        out_path=out_path,
+        font=cfg["captions_font_family"],
+        size=cfg["captions_font_size"],
+        color=cfg["captions_color"],
+        hlcolor=cfg["captions_highlight_color"],
+        outline=cfg.get("captions_outline_px", 2),
+        shadow=cfg.get("captions_shadow_px", 1),
+        window_size=cfg.get("words_per_caption", 6),
+        min_display=0.05,
+        pause_threshold=cfg.get("pause_threshold", 1.0),
+        karaoke=cfg.get("captions_highlight_style", "word") == "karaoke",
     )
     return out_path
 
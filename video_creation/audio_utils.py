@@ -1,27 +1,53 @@
-from typing import List, Union
+from typing import Dict, Iterable, List, Optional, Union
 import ffmpeg
 from ffmpeg.nodes import FilterableStream
 from utils import settings
 
-def merge_background_audio(audio: ffmpeg, reddit_id: str):
-    """Gather an audio and merge with assets/backgrounds/background.mp3"""
+DEFAULT_SAMPLE_RATE = 44100
+CAPTION_SAMPLE_RATE = 16000  # Whisper/wav2vec2 resamplen ohnehin auf 16 kHz
+
+
+def working_sample_rate(rates: Iterable[Optional[int]]) -> int:
+    """The one sample rate the final graph works in: the highest rate of the clips.
+
+    Clips from one provider (the usual case) share their rate and are not
+    resampled at all; mixed clips are resampled once, up, never down.
+    """
+    known = [int(rate) for rate in rates if rate]
+    return max(known) if known else DEFAULT_SAMPLE_RATE
+
+
+def concat_clips(clips: List[Dict], sample_rate: int):
+    """Concatenates manifest clips inside the final filter graph (decoded once, no intermediate file)."""
+    streams = []
+    for clip in clips:
+        stream = ffmpeg.input(clip["path"]).audio
+        if clip.get("sample_rate") and int(clip["sample_rate"]) != sample_rate:
+            stream = stream.filter("aresample", sample_rate)
+        streams.append(stream)
+    return ffmpeg.concat(*streams, a=1, v=0)
+
+
+def merge_background_audio(audio: ffmpeg, reddit_id: str, sample_rate: Optional[int] = None):
+    """Gather an audio and merge with the background audio cut by chop_background"""
     vol = settings.config["settings"]["background"]["background_audio_volume"]
     if vol == 0:
         return audio
-    bg = (
-        ffmpeg
-        .input(f"assets/temp/{reddit_id}/background.mp3")
-        .filter("volume", vol)
-    )
+    bg = ffmpeg.input(f"assets/temp/{reddit_id}/background.mka").audio
+    if sample_rate:
+        bg = bg.filter("aresample", sample_rate)
+    bg = bg.filter("volume", vol)
     return ffmpeg.filter([audio, bg], "amix", duration="longest")
 
 def concat_audio_files(
     audio_inputs: List[Union[str, FilterableStream]],
-    output_path: str
+    output_path: str,
+    sample_rate: int = CAPTION_SAMPLE_RATE,
 ):
     """
     Nimmt eine Liste von Pfaden (str) oder ffmpeg.input-Streams (FilterableStream)
-    und schreibt sie zusammen in output_path.
+    und schreibt sie zusammen als WAV (PCM, mono) in output_path.
+    Nur noch für die Caption-Modi nötig – das Video selbst liest die Clips direkt.
     """
     # 1) Wenn ein Element ein Pfad ist, in einen Stream umwandeln
     streams = [
@@ -30,20 +56,18 @@ def concat_audio_files(
     ]
     # 2) Zusammenfügen: nur Audio (a=1), kein Video (v=0)
     concat = ffmpeg.concat(*streams, a=1, v=0)
-    # 3) In Datei schreiben
+    # 3) In Datei schreiben – verlustfrei, kein weiterer MP3-Encode
     (
         ffmpeg
         .output(
             concat,
             output_path,
             **{
-                "c:a": "libmp3lame",
-                "b:a": "192k",
-                "ar": "24000",
+                "c:a": "pcm_s16le",
+                "ar": sample_rate,
                 "ac": 1,
-                "sample_fmt": "s16p",
             },
         )
         .overwrite_output()
         .run(quiet=True)
-    )
\ No newline at end of file
+    )
@@ -1,16 +1,19 @@
+import bisect
 import json
+import os
 import random
 import re
 from pathlib import Path
 from random import randrange
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+import ffmpeg
 import yt_dlp
-from moviepy.editor import AudioFileClip, VideoFileClip
-from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
+from moviepy.editor import VideoFileClip
 
-from utils import settings
+from utils import metrics, settings
 from utils.console import print_step, print_substep
+from video_creation.media_index import media_index
 
 
 def load_background_options():
@@ -36,15 +39,20 @@ def load_background_options():
     return background_options
 
 
-def get_start_and_end_times(video_length: int, length_of_clip: int) -> Tuple[int, int]:
+def get_start_and_end_times(
+    video_length: int, length_of_clip: float, keyframes: Optional[List[float]] = None
+) -> Tuple[float, float]:
     """Generates a random interval of time to be used as the background of the video.
 
     Args:
         video_length (int): Length of the video
-        length_of_clip (int): Length of the video to be used as the background
+        length_of_clip (float): Length of the video to be used as the background,
+            usually looked up in the media index (media_index.duration)
+        keyframes (list[float], optional): Sorted keyframe timestamps of the background.
+            If given, the interval starts on a keyframe so it can be cut by stream copy.
 
     Returns:
-        tuple[int,int]: Start and end time of the randomized interval
+        tuple[float,float]: Start and end time of the randomized interval
     """
     initialValue = 180
     # Issue #1649 - Ensures that will be a valid interval in the video
@@ -53,7 +61,14 @@ def get_start_and_end_times(video_length: int, length_of_clip: int) -> Tuple[int
             raise Exception("Your background is too short for this video length")
         else:
             initialValue //= 2  # Divides the initial value by 2 until reach 0
-    random_time = randrange(initialValue, int(length_of_clip) - int(video_length))
+    latest_start = int(length_of_clip) - int(video_length)
+    if keyframes:
+        lo = bisect.bisect_left(keyframes, initialValue)
+        hi = bisect.bisect_left(keyframes, latest_start)
+        if lo < hi:
+            random_time = keyframes[randrange(lo, hi)]
+            return random_time, random_time + video_length
+    random_time = randrange(initialValue, latest_start)
     return random_time, random_time + video_length
 
 
@@ -120,8 +135,97 @@ def download_background_audio(background_config: Tuple[str, str, str]):
     print_substep("Background audio downloaded successfully! 🎉", style="bold green")
 
 
+def _stream_copy_subclip(source: str, start: float, end: float, target: str) -> None:
+    """Cuts [start, end) without re-encoding. start should sit on a keyframe."""
+    (
+        ffmpeg.input(source, ss=start, t=end - start)
+        .output(target, c="copy", an=None, avoid_negative_ts="make_zero")
+        .overwrite_output()
+        .run(quiet=True)
+    )
+
+
+# encoder used to rebuild the boundary GOP, must produce the same codec as the source
+SMART_CUT_ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+# ffprobe profile name → encoder profile; other profiles (4:2:2, 4:4:4 …) are not smart-cut
+SMART_CUT_PROFILES = {
+    "h264": {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high"},
+    "hevc": {"Main": "main", "Main 10": "main10"},
+}
+
+
+def _head_encode_args(meta: Dict) -> Optional[Dict]:
+    """Encoder settings for the boundary GOP that match the stream-copied rest
+    (codec, profile, level, pix_fmt, frame rate; timebase for the joined file).
+    None if that isn't possible."""
+    codec = meta.get("codec")
+    encoder = SMART_CUT_ENCODERS.get(codec)
+    profile = SMART_CUT_PROFILES.get(codec, {}).get(meta.get("profile", ""))
+    _, _, timescale = meta.get("time_base", "").partition("/")
+    if encoder is None or profile is None or not meta.get("pix_fmt") or not timescale.isdigit():
+        return None
+
+    args = {
+        "c:v": encoder,
+        "crf": 16,
+        "preset": "veryfast",
+        "profile:v": profile,
+        "pix_fmt": meta["pix_fmt"],
+        "video_track_timescale": int(timescale),
+    }
+    level = int(meta.get("level") or 0)
+    if level > 0:
+        if codec == "h264":
+            args["level:v"] = f"{level / 10:g}"  # ffprobe: 40 → 4.0
+        else:
+            args["x265-params"] = f"level-idc={level / 30:g}"  # ffprobe: 120 → 4.0
+    if meta.get("fps"):
+        args["r"] = meta["fps"]
+    return args
+
+
+def _smart_cut_subclip(
+    source: str, start: float, end: float, target: str, keyframes: List[float], meta: Dict
+) -> bool:
+    """Re-encodes only the partial GOP between start and the next keyframe and
+    stream-copies the rest. Returns False if the source can't be smart-cut."""
+    head_args = _head_encode_args(meta)
+    idx = bisect.bisect_right(keyframes, start)
+    if head_args is None or idx >= len(keyframes) or keyframes[idx] >= end:
+        return False
+    boundary = keyframes[idx]
+    timescale = head_args.pop("video_track_timescale")
+
+    # MPEG-TS (Annex B): jeder Teil trägt SPS/PPS vor seinem ersten Keyframe im Stream,
+    # der Decoder wechselt am Übergang also auf die Parameter des kopierten Rests
+    head = f"{target}.head.ts"
+    tail = f"{target}.tail.ts"
+    concat_list = f"{target}.txt"
+    try:
+        (
+            ffmpeg.input(source, ss=start, t=boundary - start)
+            .output(head, an=None, **head_args)
+            .overwrite_output()
+            .run(quiet=True)
+        )
+        _stream_copy_subclip(source, boundary, end, tail)
+        with open(concat_list, "w", encoding="utf-8") as f:
+            f.write(f"file '{os.path.basename(head)}'\nfile '{os.path.basename(tail)}'\n")
+        (
+            ffmpeg.input(concat_list, f="concat", safe=0)
+            .output(target, c="copy", video_track_timescale=timescale)
+            .overwrite_output()
+            .run(quiet=True)
+        )
+    finally:
+        for path in (head, tail, concat_list):
+            if os.path.exists(path):
+                os.remove(path)
+    return True
+
+
 def chop_background(background_config: Dict[str, Tuple], video_length: int, reddit_object: dict):
-    """Generates the background audio and footage to be used in the video and writes it to assets/temp/background.mp3 and assets/temp/background.mp4
+    """Generates the background audio and footage to be used in the video and writes it to assets/temp/background.mka and assets/temp/background.mp4
 
     Args:
         background_config (Dict[str,Tuple]]) : Current background configuration
@@ -129,38 +233,53 @@ def chop_background(background_config: Dict[str, Tuple], video_length: int, redd
     """
     id = re.sub(r"[^\w\s-]", "", reddit_object["thread_id"])
 
-    if settings.config["settings"]["background"][f"background_audio_volume"] == 0:
-        print_step("Volume was set to 0. Skipping background audio creation . . .")
-    else:
-        print_step("Finding a spot in the backgrounds audio to chop...✂️")
-        audio_choice = f"{background_config['audio'][2]}-{background_config['audio'][1]}"
-        background_audio = AudioFileClip(f"assets/backgrounds/audio/{audio_choice}")
-        start_time_audio, end_time_audio = get_start_and_end_times(
-            video_length, background_audio.duration
-        )
-        background_audio = background_audio.subclip(start_time_audio, end_time_audio)
-        background_audio.write_audiofile(f"assets/temp/{id}/background.mp3")
-
-    print_step("Finding a spot in the backgrounds video to chop...✂️")
-    video_choice = f"{background_config['video'][2]}-{background_config['video'][1]}"
-    background_video = VideoFileClip(f"assets/backgrounds/video/{video_choice}")
-    start_time_video, end_time_video = get_start_and_end_times(
-        video_length, background_video.duration
-    )
-    # Extract video subclip
-    try:
-        ffmpeg_extract_subclip(
-            f"assets/backgrounds/video/{video_choice}",
-            start_time_video,
-            end_time_video,
-            targetname=f"assets/temp/{id}/background.mp4",
+    with metrics.span(id, "background") as span:
+        if settings.config["settings"]["background"][f"background_audio_volume"] == 0:
+            print_step("Volume was set to 0. Skipping background audio creation . . .")
+        else:
+            print_step("Finding a spot in the backgrounds audio to chop...✂️")
+            audio_choice = f"{background_config['audio'][2]}-{background_config['audio'][1]}"
+            audio_path = f"assets/backgrounds/audio/{audio_choice}"
+            start_time_audio, end_time_audio = get_start_and_end_times(
+                video_length, media_index.duration(audio_path)
+            )
+            # Stream-Copy in Matroska (nimmt jeden Audio-Codec): dekodiert und resampelt
+            # wird erst im finalen Graph, ein verlustbehafteter Zwischenencode entfällt
+            (
+                ffmpeg.input(audio_path, ss=start_time_audio, t=end_time_audio - start_time_audio)
+                .output(f"assets/temp/{id}/background.mka", vn=None, acodec="copy")
+                .overwrite_output()
+                .run(quiet=True)
+            )
+
+        print_step("Finding a spot in the backgrounds video to chop...✂️")
+        video_choice = f"{background_config['video'][2]}-{background_config['video'][1]}"
+        video_path = f"assets/backgrounds/video/{video_choice}"
+        video_meta = media_index.get(video_path)
+        keyframes = video_meta["keyframes"]
+        start_time_video, end_time_video = get_start_and_end_times(
+            video_length, video_meta["duration"], keyframes
         )
-    except (OSError, IOError):  # ffmpeg issue see #348
-        print_substep("FFMPEG issue. Trying again...")
-        with VideoFileClip(f"assets/backgrounds/video/{video_choice}") as video:
-            new = video.subclip(start_time_video, end_time_video)
-            new.write_videofile(f"assets/temp/{id}/background.mp4")
-    print_substep("Background video chopped successfully!", style="bold green")
+        target = f"assets/temp/{id}/background.mp4"
+        on_keyframe = bool(keyframes) and start_time_video in keyframes
+        exact_cut = settings.config["settings"]["background"].get("background_exact_cut", False)
+        # Extract video subclip: pure stream copy when the window starts on a keyframe,
+        # otherwise (optionally) re-encode just the boundary GOP
+        try:
+            if on_keyframe or not (
+                exact_cut
+                and _smart_cut_subclip(
+                    video_path, start_time_video, end_time_video, target, keyframes, video_meta
+                )
+            ):
+                _stream_copy_subclip(video_path, start_time_video, end_time_video, target)
+        except ffmpeg.Error:  # ffmpeg issue see #348
+            print_substep("FFMPEG issue. Trying again...")
+            with VideoFileClip(f"assets/backgrounds/video/{video_choice}") as video:
+                new = video.subclip(start_time_video, end_time_video)
+                new.write_videofile(f"assets/temp/{id}/background.mp4")
+        span.add_files(target, f"assets/temp/{id}/background.mka")
+        print_substep("Background video chopped successfully!", style="bold green")
     return background_config["video"][2]
 
 
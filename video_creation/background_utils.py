@@ -1,20 +1,23 @@
 import ffmpeg, multiprocessing
+from typing import Tuple
+from ffmpeg.nodes import FilterableStream
+
+from video_creation.encoder_utils import global_args, hw_upload, video_output_args
 
 def prepare_background(reddit_id: str, W: int, H: int) -> str:
     output_path = f"assets/temp/{reddit_id}/background_noaudio.mp4"
+    stream = ffmpeg.input(f"assets/temp/{reddit_id}/background.mp4").filter("crop", f"ih*({W}/{H})", "ih")
     output = (
-        ffmpeg.input(f"assets/temp/{reddit_id}/background.mp4")
-        .filter("crop", f"ih*({W}/{H})", "ih")
+        hw_upload(stream)
         .output(
             output_path,
             an=None,
             **{
-                "c:v": "h264_videotoolbox",  # for mac
-                "b:v": "20M",
-                "b:a": "192k",
+                **video_output_args(),
                 "threads": multiprocessing.cpu_count(),
             },
         )
+        .global_args(*global_args())
         .overwrite_output()
     )
     try:
@@ -22,4 +25,26 @@ def prepare_background(reddit_id: str, W: int, H: int) -> str:
     except ffmpeg.Error as e:
         print(e.stderr.decode("utf8"))
         exit(1)
-    return output_path
\ No newline at end of file
+    return output_path
+
+
+def background_stream(reddit_id: str, W: int, H: int) -> Tuple[FilterableStream, float]:
+    """
+    Single-pass variant of prepare_background: crop and scale to W x H happen
+    inside the final render graph instead of in a separate encode.
+
+    Returns the scaled stream and the factor between the target height and the
+    source height. Overlays and text that used to be sized for the crop
+    resolution have to be multiplied by that factor to keep the same layout.
+    """
+    input_path = f"assets/temp/{reddit_id}/background.mp4"
+    video_info = next(
+        s for s in ffmpeg.probe(input_path)["streams"] if s["codec_type"] == "video"
+    )
+    scale = H / int(video_info["height"])
+    stream = (
+        ffmpeg.input(input_path)["v"]
+        .filter("crop", f"ih*({W}/{H})", "ih")
+        .filter("scale", W, H)
+    )
+    return stream, scale
@@ -32,6 +32,138 @@ Format: Name,Fontname,Fontsize,PrimaryColour,SecondaryColour,OutlineColour,BackC
 Format: Layer,Start,End,Style,Text
 """
 
+# ═══════════════════════════════════════ gemeinsamer Writer ═══════════════════════════════════════
+def _display_times(
+    words: list[dict], offset: float, preroll: float, min_display: float, pause_threshold: float | None
+) -> list[tuple[float, float]]:
+    """Absolute (start, end) in der jedes Wort gehighlightet ist.
+
+    Das Highlight bleibt bis zum nächsten Wort stehen – außer die Pause dazwischen ist
+    länger als pause_threshold (None = nie), dann endet es mit dem Wort.
+    """
+    times = []
+    for idx, w in enumerate(words):
+        start = offset + w["start_time"] - preroll
+        nxt = words[idx + 1] if idx + 1 < len(words) else None
+        if nxt is not None and (pause_threshold is None or nxt["start_time"] - w["end_time"] <= pause_threshold):
+            end = max(start + min_display, offset + nxt["start_time"] - preroll)
+        else:
+            end = max(start + min_display, offset + w["end_time"])
+        times.append((start, end))
+    return times
+
+
+def write_caption_ass(
+    clips: list[list[dict]],
+    *,
+    out_path          : str,
+    font              : str,
+    size              : int,
+    color             : str,
+    hlcolor           : str,
+    outline           : int        = 2,
+    shadow            : int        = 1,
+    window_size       : int        = 1,
+    highlight_scale   : float      = 1.0,
+    preroll           : float      = 0.0,
+    min_display       : float      = 0.0,
+    pause_threshold   : float | None = None,
+    offsets           : list[float] | None = None,   # Start jedes Clips; None → Ende des vorherigen + gap
+    gap               : float      = 0.0,
+    karaoke           : bool       = False,
+) -> list[float]:
+    """
+    Schreibt Wort-Timings als ASS – ein Dialogue-Event pro Wortfenster statt pro Wort.
+
+    • clips: Wortlisten [{word, start_time, end_time}] mit Zeiten relativ zum Clip
+    • Fenster = window_size aufeinanderfolgende Wörter eines Clips; es wird nur bei
+      Pausen > pause_threshold in mehrere Events geteilt (Caption blendet aus).
+    • Highlight des gesprochenen Worts über zeitgesteuerte Override-Tags (\\t), bzw.
+      mit karaoke=True als \\kf-Fill (gesprochene Wörter bleiben eingefärbt).
+    • Events werden direkt in die Datei gestreamt – linear in der Wortzahl.
+
+    Returns:
+        Das tatsächliche Ende jedes Clips (letztes Event).
+    """
+    prim = _hex_to_ass(color)
+    hl   = _hex_to_ass(hlcolor)
+    pct  = round(highlight_scale * 100)
+    if karaoke:   # \k: Secondary = noch nicht gesprochen, Primary = gesprochen
+        colours = f"&H00{hl},&H00{prim}"
+    else:
+        colours = f"&H00{prim},&H00{hl}"
+    style = (
+        f"Style: koko,{font},{size},{colours},"
+        f"&H00000000,&H00000000,0,0,0,1,{outline},{shadow},5,0,0,40,1"
+    )
+
+    clip_ends: list[float] = []
+    cursor = 0.0
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(ASS_HEAD.format(style=style))
+        for clip_no, words in enumerate(clips):
+            if offsets is not None:
+                cursor = offsets[clip_no]
+            if not words:                                           # leerer Clip
+                clip_ends.append(cursor)
+                continue
+
+            times = _display_times(words, cursor, preroll, min_display, pause_threshold)
+            clip_end = cursor
+            for base in range(0, len(words), window_size):
+                window = range(base, min(base + window_size, len(words)))
+                # Läufe ohne lange Pause → je ein Event
+                run_start = window.start
+                for idx in window:
+                    last_of_run = idx + 1 == window.stop or times[idx][1] < times[idx + 1][0] - 0.005
+                    if not last_of_run:
+                        continue
+                    ev_start, ev_end = times[run_start][0], times[idx][1]
+                    text = _window_text(words, times, window, range(run_start, idx + 1), ev_start, hl, prim, pct, karaoke)
+                    f.write(f"Dialogue: 0,{_ass_time(ev_start)},{_ass_time(ev_end)},koko,{text}\n")
+                    clip_end = max(clip_end, ev_end)
+                    run_start = idx + 1
+            clip_ends.append(clip_end)
+            cursor = clip_end + gap
+    return clip_ends
+
+
+def _window_text(words, times, window, active, ev_start, hl, prim, pct, karaoke) -> str:
+    parts = []
+    elapsed = 0                                                     # cs seit ev_start (Karaoke)
+    for idx in window:
+        txt = words[idx]["word"]
+        if karaoke:
+            if idx in active:
+                # Lücke vor dem ersten Wort des Events bleibt ungefüllt
+                lead = round((times[idx][0] - ev_start) * 100) if idx == active.start else 0
+                dur  = round((times[idx][1] - times[idx][0]) * 100)
+                txt  = (rf"{{\k{lead}}}" if lead > 0 else "") + rf"{{\kf{dur}}}{txt}"
+                elapsed += lead + dur
+            elif idx < active.start:
+                txt = rf"{{\k0}}{txt}"                             # schon gesprochen
+            elif idx == active.stop:
+                # noch nicht gesprochen (kommt im nächsten Event): eigene Silbe bis über das
+                # Event-Ende, sonst füllt libass es mit dem \kf des letzten aktiven Worts
+                rest = round((times[active.stop - 1][1] - ev_start) * 100) - elapsed
+                txt  = rf"{{\k{max(1, rest + 1)}}}{txt}"
+        elif idx in active:
+            t1 = max(0, round((times[idx][0] - ev_start) * 1000))
+            t2 = max(t1, round((times[idx][1] - ev_start) * 1000))
+            on  = rf"\c&H{hl}&\fscx{pct}\fscy{pct}"
+            off = rf"\c&H{prim}&\fscx100\fscy100"
+            # \t(…,0,…) heißt für libass "bis Event-Ende" → ab 0 ms direkt setzen statt animieren
+            on  = on if t1 == 0 else rf"\t({t1},{t1},{on})"
+            t2  = max(t2, 1)
+            txt = rf"{{{on}\t({t2},{t2},{off})}}{txt}"
+        parts.append(txt)
+    return " ".join(parts)
+
+
+def _highlight_is_karaoke() -> bool:
+    return settings.config["settings"]["captions"].get("captions_highlight_style", "word") == "karaoke"
+
+
 # ═════════════════════════════════════════════ builder ════════════════════════════════════════════
 def build_ass(
     json_paths: list[str],
@@ -46,6 +178,7 @@ def build_ass(
     min_display       : float      = 0.00,       # Mindest-Einblendedauer
     normalize_lead_in : bool       = False,
     gap               : float      = 0.0,        # erzwungene Stille zwischen Clips
+    durations         : list[float] | None = None,  # echte Clip-Längen (manifest.json)
     out_path          : str        = "captions.ass",
 ) -> str:
     """
@@ -55,6 +188,8 @@ def build_ass(
         wird unsichtbar – seine Dauer wird ans vorherige sichtbare Wort rangehängt.
       • Der Offset des *nächsten* Clips = tatsächliches End-Time-Stamp des letzten Dialog-Events.
         → kein Aufaddieren kleiner Kokoro-Fehler mehr.
+      • Mit `durations` (Länge jeder MP3 aus dem Clip-Manifest) startet Clip i exakt bei
+        sum(durations[:i]); `gap` wird dann ignoriert, die Stille steckt schon in den MP3s.
     """
 
     cfg   = settings.config["settings"]["captions"]
@@ -63,27 +198,14 @@ def build_ass(
     color = color   or cfg["captions_color"]
     hlcol = hlcolor or cfg["captions_highlight_color"]
 
-    primary   = f"&H00{_hex_to_ass(color)}"
-    secondary = f"&H00{_hex_to_ass(hlcol)}"
-    outline_c = "&H00000000"
-    back_c    = "&H00000000"
-
-    style = (
-        f"Style: koko,{font},{size},{primary},{secondary},"
-        f"{outline_c},{back_c},0,0,0,1,2,1,5,0,0,40,1"
-    )
-    big = int(size * highlight_scale)
-
     # ----------  RegExp für reine Punctuation  ----------
     def _is_punct(word: str) -> bool:
         return all(
             (ud.category(ch).startswith("P") or ch.isspace()) for ch in word
         )
 
-    events: list[str] = []
-    cursor = 0.0                         # absoluter Zeit-Cursor der erzeugten Datei
-
-    # ═════════════════════════════ pro Clip ═════════════════════════════
+    # ═════════════════════════════ pro Clip: sichtbare Wörter ═════════════════════════════
+    clips: list[list[dict]] = []
     for jp in json_paths:
         with open(jp, encoding="utf-8") as f:
             raw = json.load(f) or []
@@ -100,46 +222,35 @@ def build_ass(
             last = tok.copy()
             words.append(last)
 
-        if not raw:                                             # leerer Clip
-            continue
-
         # 2) Lead-In-Normalisierung
-        lead_in = min(t["start_time"] for t in raw)
-        shift   = -lead_in if (lead_in < 0 and normalize_lead_in) else 0.0
-
-        # 3) Dialog-Events erzeugen
-        clip_end = cursor                                      # wird on the fly aktualisiert
-        for idx, w in enumerate(words):
-            base   = (idx // words_per_line) * words_per_line
-            window = words[base : base + words_per_line]
-
-            start  = cursor + w["start_time"] + shift - preroll
-            if idx + 1 < len(words):
-                next_start = cursor + words[idx + 1]["start_time"] + shift - preroll
-                end = max(start + min_display, next_start)
-            else:
-                end = cursor + w["end_time"] + shift
-                if end - start < min_display:
-                    end = start + min_display
-
-            clip_end = max(clip_end, end)                     # tatsächliches Clip-Ende
-
-            parts = []
-            for token in window:
-                txt = token["word"]
-                if token is w:
-                    txt = rf"{{\b1\fs{big}\c&H{_hex_to_ass(hlcol)}&}}{txt}{{\r}}"
-                parts.append(txt)
-
-            events.append(
-                f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},koko,{' '.join(parts)}"
-            )
-
-        # 4) Cursor für nächsten Clip
-        cursor = clip_end + gap
-
-    Path(out_path).write_text(
-        ASS_HEAD.format(style=style) + "\n".join(events),
-        encoding="utf-8",
+        if raw and normalize_lead_in:
+            lead_in = min(t["start_time"] for t in raw)
+            if lead_in < 0:
+                for w in words:
+                    w["start_time"] -= lead_in
+                    w["end_time"]   -= lead_in
+        clips.append(words)
+
+    # 3) Events: Clip-Offset = echte Clip-Längen oder Ende des vorherigen Clips + gap
+    offsets = None
+    if durations is not None:
+        offsets, acc = [], 0.0
+        for d in durations:
+            offsets.append(acc)
+            acc += d
+    write_caption_ass(
+        clips,
+        out_path=out_path,
+        font=font,
+        size=size,
+        color=color,
+        hlcolor=hlcol,
+        window_size=words_per_line,
+        highlight_scale=highlight_scale,
+        preroll=preroll,
+        min_display=min_display,
+        offsets=offsets,
+        gap=gap,
+        karaoke=_highlight_is_karaoke(),
     )
     return out_path
@@ -1,13 +1,19 @@
+import multiprocessing
 import os
 import re
+import sys
 import textwrap
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 from pilmoji import Pilmoji
 from rich.progress import track
-from utils.fonts import getheight, getsize
+from utils.emoji_source import emoji_source
+from utils.fonts import ROBOTO_BOLD, ROBOTO_REGULAR, getheight, getsize, load_font
 from TTS.engine_wrapper import process_text
-from utils import settings
+from utils import metrics, settings
+from utils.console import print_substep
 
 
 
@@ -64,21 +70,12 @@ def create_comment_card(
     primary_text_color = parse_color(thumbnail_config.get("primary_text_color", "255,255,255"))
     secondary_text_color = parse_color(thumbnail_config.get("secondary_text_color", "180,180,180"))
     
-    # Load fonts with proper sizing
-    try:
-        title_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Regular.ttf"), 28)  # Smaller, less prominent
-        author_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), 36)     # Prominent author
-        text_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Regular.ttf"), 40)
-        upvote_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Regular.ttf"), 28)  # Match thumbnail metrics font
-        
-        # Note: Emoji handling is done via Pilmoji, no separate emoji font needed
-            
-    except OSError:
-        # Fallback to default font
-        title_font = ImageFont.load_default()
-        author_font = ImageFont.load_default()
-        text_font = ImageFont.load_default()
-        upvote_font = ImageFont.load_default()
+    # Load fonts with proper sizing (cached per process, falls back to PIL's default font)
+    title_font = load_font(ROBOTO_REGULAR, 28)  # Smaller, less prominent
+    author_font = load_font(ROBOTO_BOLD, 36)     # Prominent author
+    text_font = load_font(ROBOTO_REGULAR, 40)
+    upvote_font = load_font(ROBOTO_REGULAR, 28)  # Match thumbnail metrics font
+    # Note: Emoji handling is done via Pilmoji, no separate emoji font needed
     
     # Calculate content dimensions first - use more aggressive space usage
     available_width = width - 3 * padding  # Less conservative padding
@@ -172,7 +169,7 @@ def create_comment_card(
     img.paste(background, (padding, padding), background)
     
     # Use Pilmoji for proper emoji rendering like fancy_thumbnail
-    with Pilmoji(img) as p:
+    with Pilmoji(img, source=emoji_source()) as p:
         current_y = padding * 2
         
         # Draw post title (if available) - left aligned
@@ -228,10 +225,80 @@ def generate_comment_cards(reddit_obj: dict, output_dir: str, card_count: int =
         'comment_score': reddit_obj.get('upvotes', 0)
     }
     
-    title_card = create_comment_card(title_data, reddit_obj)
-    title_card.save(f"{output_dir}/title.png")
-    
-    # Create comment cards
-    for idx, comment in track(enumerate(comments), description="Generating comment cards"):
-        card = create_comment_card(comment, reddit_obj)
-        card.save(f"{output_dir}/comment_{idx}.png")
\ No newline at end of file
+    jobs = [(title_data, f"{output_dir}/title.png")] + [
+        (comment, f"{output_dir}/comment_{idx}.png") for idx, comment in enumerate(comments)
+    ]
+
+    with metrics.span(reddit_obj.get("thread_id"), "cards", cards=len(jobs)) as span:
+        workers = card_render_workers(len(jobs))
+        if workers > 1:
+            pending = _render_parallel(jobs, reddit_obj, workers)
+        else:
+            pending = jobs
+
+        # sequentiell: ein Kern, Pool deaktiviert oder Rest nach einem kaputten Pool
+        for comment, out_path in track(pending, description="Generating comment cards"):
+            _render_card(comment, reddit_obj, out_path)
+        span.add_files(*(out_path for _, out_path in jobs))
+
+
+def card_render_workers(job_count: int) -> int:
+    """Worker processes for card rendering: the configured count, 0 = one per available core."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # Windows / macOS
+        cores = os.cpu_count() or 1
+    configured = int(settings.config["settings"]["thumbnail"].get("card_render_workers", 0) or 0)
+    workers = configured if configured > 0 else cores
+    return max(1, min(workers, cores, job_count))
+
+
+def _pool_context():
+    """Start method of the card render workers.
+
+    Linux: fork – the workers inherit the loaded modules and start instantly
+    (spawn/forkserver would re-import main.py and its whole import tree in
+    every worker). The locks a card render can take while another thread of
+    a batch holds them (emoji source, sprite cache, CDN session) are taken
+    around the fork, see utils/emoji_source.py. Elsewhere: spawn.
+    """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+def _init_render_worker(config: dict) -> None:
+    # spawn-Start erbt die geladene Config nicht
+    settings.config = config
+
+
+def _render_card(comment_data: dict, reddit_obj: dict, out_path: str) -> str:
+    create_comment_card(comment_data, reddit_obj).save(out_path)
+    return out_path
+
+
+def _render_parallel(jobs: list, reddit_obj: dict, workers: int) -> list:
+    """Renders the cards on a process pool. Returns the jobs that still have to be rendered."""
+    pending = {out_path: (comment, out_path) for comment, out_path in jobs}
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=_pool_context(),
+            initializer=_init_render_worker,
+            initargs=(settings.config,),
+        ) as pool:
+            futures = [
+                pool.submit(_render_card, comment, reddit_obj, out_path)
+                for comment, out_path in jobs
+            ]
+            for future in track(
+                as_completed(futures),
+                total=len(futures),
+                description=f"Generating comment cards ({workers} processes)",
+            ):
+                pending.pop(future.result(), None)
+    except (BrokenProcessPool, OSError) as e:
+        print_substep(
+            f"Parallel card rendering failed ({e}), rendering the rest sequentially", style="bold red"
+        )
+    return list(pending.values())
\ No newline at end of file
@@ -3,7 +3,8 @@ import textwrap
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 from pilmoji import Pilmoji
-from utils.fonts import getheight, getsize
+from utils.emoji_source import emoji_source
+from utils.fonts import ROBOTO_BOLD, ROBOTO_REGULAR, getheight, getsize, load_font
 from utils import settings
 
 
@@ -69,15 +70,10 @@ def create_dynamic_thumbnail(
     secondary_text_color = parse_color(thumbnail_config.get("secondary_text_color", "180,180,180"))
     profile_image_path = thumbnail_config.get("profile_image_path", "assets/profile.png")
     
-    # Load fonts
-    try:
-        channel_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), 32)
-        title_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), 48)
-        metrics_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Regular.ttf"), 28)
-    except OSError:
-        channel_font = ImageFont.load_default()
-        title_font = ImageFont.load_default()
-        metrics_font = ImageFont.load_default()
+    # Load fonts (cached per process)
+    channel_font = load_font(ROBOTO_BOLD, 32)
+    title_font = load_font(ROBOTO_BOLD, 48)
+    metrics_font = load_font(ROBOTO_REGULAR, 28)
     
     # Calculate content dimensions - use more aggressive space usage
     available_width = int(width - 2.5 * padding)  # Less conservative padding
@@ -174,7 +170,7 @@ def create_dynamic_thumbnail(
     img.paste(background, (padding, padding), background)
     
     # Use Pilmoji for text rendering with emoji support
-    with Pilmoji(img) as p:
+    with Pilmoji(img, source=emoji_source()) as p:
         current_y = padding * 2
         
         # Create and paste circular profile image
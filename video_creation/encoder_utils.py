@@ -0,0 +1,199 @@
+"""
+Video encoder selection and rate control.
+
+At startup the encoders of the local ffmpeg build are read from
+`ffmpeg -encoders`; hardware encoders (NVENC, QSV, VAAPI, VideoToolbox) are
+additionally test-encoded once, because ffmpeg lists them even when no
+matching GPU/driver is present. The best working encoder for the configured
+codec is used together with a named profile:
+
+    draft    – fastest preset, low quality (previews)
+    fast     – default, good quality at a small size
+    quality  – slow preset, near-transparent
+
+Everything is configured in [settings.encoding]. With target_size_mb > 0 the
+profile's constant-quality setting is replaced by a capped bitrate so that the
+output lands at (about) that size.
+"""
+from __future__ import annotations
+
+import subprocess
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional
+
+from ffmpeg.nodes import FilterableStream
+
+from utils import settings
+from utils.console import print_substep
+
+# in order of preference – hardware first, the software encoder is the fallback
+CANDIDATES: Dict[str, List[str]] = {
+    "h264": ["h264_nvenc", "h264_qsv", "h264_vaapi", "h264_videotoolbox", "libx264"],
+    "hevc": ["hevc_nvenc", "hevc_qsv", "hevc_vaapi", "hevc_videotoolbox", "libx265"],
+    "av1": ["av1_nvenc", "av1_qsv", "av1_vaapi", "libsvtav1", "libaom-av1"],
+}
+HARDWARE_SUFFIXES = ("_nvenc", "_qsv", "_vaapi", "_videotoolbox")
+# encoders that reject maxrate/bufsize together with an average bitrate (SVT-AV1 only caps CRF)
+NO_VBV_ENCODERS = frozenset({"libsvtav1"})
+
+# crf is on the libx264 scale; the other encoders get it mapped (see _quality_args)
+PROFILES: Dict[str, Dict] = {
+    "draft": {
+        "crf": 30, "preset": "ultrafast", "svt_preset": 12,
+        "nvenc_preset": "p1", "qsv_preset": "veryfast", "vt_quality": 45,
+    },
+    "fast": {
+        "crf": 23, "preset": "veryfast", "svt_preset": 10,
+        "nvenc_preset": "p4", "qsv_preset": "faster", "vt_quality": 60,
+    },
+    "quality": {
+        "crf": 18, "preset": "slow", "svt_preset": 6,
+        "nvenc_preset": "p7", "qsv_preset": "slower", "vt_quality": 75,
+    },
+}
+DEFAULT_PROFILE = "fast"
+DEFAULT_AUDIO_BITRATE = "192k"
+
+
+def _config() -> Dict:
+    return settings.config["settings"].get("encoding", {})
+
+
+@lru_cache(maxsize=1)
+def available_encoders() -> FrozenSet[str]:
+    """Video encoders compiled into the local ffmpeg."""
+    try:
+        out = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"], capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return frozenset()
+    names = set()
+    for line in out.splitlines():
+        parts = line.split()
+        # " V....D libx264   libx264 H.264 / AVC ..."
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] == "V":
+            names.add(parts[1])
+    return frozenset(names)
+
+
+def is_hardware(encoder: str) -> bool:
+    return encoder.endswith(HARDWARE_SUFFIXES)
+
+
+@lru_cache(maxsize=None)
+def encoder_works(encoder: str) -> bool:
+    """Encodes a few black frames to check that the encoder (and its device) is usable."""
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    if encoder.endswith("_vaapi"):
+        cmd += ["-vaapi_device", _config().get("vaapi_device") or "/dev/dri/renderD128"]
+    cmd += ["-f", "lavfi", "-i", "color=black:s=256x256:r=30:d=0.2"]
+    if encoder.endswith("_vaapi"):
+        cmd += ["-vf", "format=nv12,hwupload"]
+    cmd += ["-c:v", encoder, "-f", "null", "-"]
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+@lru_cache(maxsize=1)
+def select_encoder() -> str:
+    """The configured encoder, or the best working one for the configured codec."""
+    cfg = _config()
+    forced = cfg.get("encoder") or ""
+    if forced:
+        return forced
+
+    codec = cfg.get("codec") or "h264"
+    use_hw = cfg.get("hardware_encoding", True)
+    available = available_encoders()
+    for encoder in CANDIDATES.get(codec, CANDIDATES["h264"]):
+        if encoder not in available or (is_hardware(encoder) and not use_hw):
+            continue
+        if is_hardware(encoder) and not encoder_works(encoder):
+            continue
+        print_substep(f"Using video encoder {encoder}", style="bold blue")
+        return encoder
+
+    # ffmpeg konnte nicht abgefragt werden – libx264 ist in praktisch jedem Build
+    print_substep(f"No working {codec} encoder detected, falling back to libx264", style="yellow")
+    return "libx264"
+
+
+def _quality_args(encoder: str, profile: Dict) -> Dict:
+    """Constant-quality rate control of the profile, translated to the encoder's options."""
+    crf = profile["crf"]
+    if encoder.endswith("_nvenc"):
+        return {"preset": profile["nvenc_preset"], "rc": "vbr", "cq": crf + 2, "b:v": 0}
+    if encoder.endswith("_qsv"):
+        return {"preset": profile["qsv_preset"], "global_quality": crf}
+    if encoder.endswith("_vaapi"):
+        return {"rc_mode": "CQP", "qp": crf + 2}
+    if encoder.endswith("_videotoolbox"):
+        return {"q:v": profile["vt_quality"]}
+    if encoder == "libsvtav1":
+        return {"preset": profile["svt_preset"], "crf": crf + 12}
+    if encoder == "libaom-av1":
+        return {"cpu-used": min(8, profile["svt_preset"] // 2 + 2), "crf": crf + 12, "b:v": 0}
+    if encoder == "libx265":
+        return {"preset": profile["preset"], "crf": crf + 5}
+    return {"preset": profile["preset"], "crf": crf}
+
+
+def _kbit(bitrate: str) -> float:
+    """'192k' → 192.0"""
+    bitrate = str(bitrate).strip().lower()
+    if bitrate.endswith("k"):
+        return float(bitrate[:-1])
+    if bitrate.endswith("m"):
+        return float(bitrate[:-1]) * 1000
+    return float(bitrate) / 1000
+
+
+def audio_bitrate() -> str:
+    return _config().get("audio_bitrate") or DEFAULT_AUDIO_BITRATE
+
+
+def video_output_args(duration: Optional[float] = None) -> Dict:
+    """Output options (-c:v + rate control) for ffmpeg.output(..., **video_output_args(d)).
+
+    duration is needed for target_size_mb; without it the profile's quality setting is used.
+    """
+    cfg = _config()
+    encoder = select_encoder()
+    profile = PROFILES.get(cfg.get("profile") or DEFAULT_PROFILE, PROFILES[DEFAULT_PROFILE])
+
+    args: Dict = {"c:v": encoder}
+    target_mb = float(cfg.get("target_size_mb", 0) or 0)
+    if target_mb > 0 and duration:
+        # Ziel-Größe → Video-Bitrate; Container-Overhead ~2 %
+        total_kbit = target_mb * 8 * 1024 * 0.98
+        video_k = max(100, int(total_kbit / duration - _kbit(audio_bitrate())))
+        args["b:v"] = f"{video_k}k"
+        if encoder not in NO_VBV_ENCODERS:
+            args.update({"maxrate": f"{video_k}k", "bufsize": f"{video_k * 2}k"})
+        if encoder.endswith("_vaapi"):
+            args["rc_mode"] = "VBR"
+        elif encoder in ("libx264", "libx265", "libsvtav1"):
+            args["preset"] = profile["preset"] if encoder != "libsvtav1" else profile["svt_preset"]
+    else:
+        args.update(_quality_args(encoder, profile))
+
+    if not encoder.endswith(("_vaapi", "_qsv")):
+        args["pix_fmt"] = "yuv420p"  # Browser/Handy-kompatibel
+    return args
+
+
+def global_args() -> List[str]:
+    """Global ffmpeg options the selected encoder needs (the VAAPI device)."""
+    if select_encoder().endswith("_vaapi"):
+        return ["-vaapi_device", _config().get("vaapi_device") or "/dev/dri/renderD128"]
+    return []
+
+
+def hw_upload(stream: FilterableStream) -> FilterableStream:
+    """Uploads the frames to the GPU if the selected encoder requires it (VAAPI)."""
+    if select_encoder().endswith("_vaapi"):
+        return stream.filter("format", "nv12").filter("hwupload")
+    return stream
@@ -15,8 +15,10 @@ from PIL import Image, ImageDraw, ImageFont
 from rich.console import Console
 from rich.progress import track
 
-from utils import settings
+from utils import metrics, settings
+from utils.checkpoint import Checkpoints, file_fingerprint, fingerprint
 from utils.cleanup import cleanup
+from utils.clip_manifest import ClipManifest
 from utils.console import print_step, print_substep
 from utils.fonts import getheight
 from utils.thumbnail import create_thumbnail
@@ -25,12 +27,18 @@ import json
 
 from video_creation.thumbnail_utils import create_fancy_thumbnail
 from video_creation.dynamic_thumbnail import create_dynamic_thumbnail
-from video_creation.audio_utils import merge_background_audio, concat_audio_files
-from video_creation.background_utils import prepare_background
+from video_creation.audio_utils import (
+    concat_audio_files,
+    concat_clips,
+    merge_background_audio,
+    working_sample_rate,
+)
+from video_creation.background_utils import background_stream, prepare_background
 from video_creation.naming_utils import name_normalize
-from video_creation.progress import ProgressFfmpeg
+from video_creation.progress import RenderProgress, run_with_progress
 from video_creation.overlay_utils import overlay_images_on_background
 from video_creation.caption_utils import build_ass
+from video_creation.encoder_utils import audio_bitrate, global_args, hw_upload, video_output_args
 
 
 console = Console()
@@ -41,7 +49,20 @@ def make_final_video(
     length: int,
     reddit_obj: dict,
     background_config: Dict[str, Tuple],
-):
+) -> str:
+    """Renders the video (timed as the "render" span) and returns its path."""
+    with metrics.span(reddit_obj["thread_id"], "render", video_seconds=length) as span:
+        main_path = _render_final_video(number_of_clips, length, reddit_obj, background_config)
+        span.add_files(main_path)
+    return main_path
+
+
+def _render_final_video(
+    number_of_clips: int,
+    length: int,
+    reddit_obj: dict,
+    background_config: Dict[str, Tuple],
+) -> str:
     # ─────────────────────────────────────────────────────────────────────────
     # BASIC CONSTANTS
     # ─────────────────────────────────────────────────────────────────────────
@@ -55,6 +76,7 @@ def make_final_video(
 
     reddit_id = re.sub(r"[^\w\s-]", "", reddit_obj["thread_id"])
     title     = reddit_obj["thread_title"]
+    manifest  = ClipManifest.load(reddit_id)   # Clip-Längen ohne ffprobe
 
     allow_only_tts = (
         settings.config["settings"]["background"]["enable_extra_audio"]
@@ -66,7 +88,14 @@ def make_final_video(
     # ─────────────────────────────────────────────────────────────────────────
     # BACKGROUND
     # ─────────────────────────────────────────────────────────────────────────
-    background_clip = ffmpeg.input(prepare_background(reddit_id, W=W, H=H))
+    # single pass: crop + scale live in the final graph, no intermediate encode.
+    # ui_scale keeps overlays/text at the size they had at the crop resolution.
+    single_pass = settings.config["settings"]["background"].get("single_pass_render", True)
+    if single_pass:
+        background_clip, ui_scale = background_stream(reddit_id, W=W, H=H)
+    else:
+        background_clip = ffmpeg.input(prepare_background(reddit_id, W=W, H=H))
+        ui_scale = 1.0
 
     # ─────────────────────────────────────────────────────────────────────────
     # AUDIO – collect → concat
@@ -77,32 +106,25 @@ def make_final_video(
 
     if storymode:
         if storymethod == 0:
-            audio_clips = [
-                ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.mp3"),
-                ffmpeg.input(f"assets/temp/{reddit_id}/mp3/postaudio.mp3"),
-            ]
+            clip_names = ["title", "postaudio"]
         else:  # storymethod == 1
-            audio_clips = [
-                ffmpeg.input(f"assets/temp/{reddit_id}/mp3/postaudio-{i}.mp3")
-                for i in range(number_of_clips + 1)
-            ]
-            audio_clips.insert(0, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.mp3"))
+            clip_names = ["title"] + [f"postaudio-{i}" for i in range(number_of_clips + 1)]
     else:
-        audio_clips = [
-            ffmpeg.input(f"assets/temp/{reddit_id}/mp3/{i}.mp3") for i in range(number_of_clips)
-        ]
-        audio_clips.insert(0, ffmpeg.input(f"assets/temp/{reddit_id}/mp3/title.mp3"))
+        clip_names = ["title"] + [f"{i}" for i in range(number_of_clips)]
 
-    concat_audio_files(audio_clips, f"assets/temp/{reddit_id}/audio.mp3")
-    base_audio  = ffmpeg.input(f"assets/temp/{reddit_id}/audio.mp3")
-    final_audio = merge_background_audio(base_audio, reddit_id)
+    # Clips werden direkt im finalen Graph dekodiert (kein audio.mp3-Zwischenencode),
+    # in einer gemeinsamen Samplerate – resampelt wird nur, was davon abweicht.
+    clips       = [manifest.get(name) for name in clip_names]
+    sample_rate = working_sample_rate(clip["sample_rate"] for clip in clips)
+    base_audio  = concat_clips(clips, sample_rate)
+    final_audio = merge_background_audio(base_audio, reddit_id, sample_rate)
 
     console.log(f"[bold green]Video will be {length} s long")
 
     # ────────────────────────────────────────────────────────────────────
     # ❶ TITLE-THUMBNAIL / OPTIONAL TEMPLATE
     # ────────────────────────────────────────────────────────────────────
-    screenshot_w = int(W * 0.45)
+    screenshot_w = min(W, int(W * 0.45 * ui_scale))
     Path(f"assets/temp/{reddit_id}/png").mkdir(parents=True, exist_ok=True)
 
     bg_cfg  = settings.config["settings"]["background"] 
@@ -137,9 +159,7 @@ def make_final_video(
             title_png = f"assets/temp/{reddit_id}/png/title.png"
             title_img.save(title_png)
             title_clip = ffmpeg.input(title_png)["v"].filter("scale", screenshot_w, -1)
-            title_duration = float(
-                ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/title.mp3")["format"]["duration"]
-            )
+            title_duration = manifest.duration("title")
         else:
             # Use existing template-based thumbnail system
             # lade das Template (oder fallback)
@@ -182,9 +202,7 @@ def make_final_video(
             title_png = f"assets/temp/{reddit_id}/png/title.png"
             title_img.save(title_png)
             title_clip = ffmpeg.input(title_png)["v"].filter("scale", screenshot_w, -1)
-            title_duration = float(
-                ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/title.mp3")["format"]["duration"]
-            )
+            title_duration = manifest.duration("title")
     else:
         # kein Template → keine Overlay-Clips, Captions starten bei t=0
         title_clip = None
@@ -192,13 +210,42 @@ def make_final_video(
 
     # ❷ ENTWEDER  Subtitle-Route  (Kokoro  ODER  Whisper)  ODER  PNG-Route
     # ─────────────────────────────────────────────────────────────────────────
-    if caption_mode == "whisper" and storymode:
-        from utils.whisper_captions import generate_whisper_ass
-        ass_path = generate_whisper_ass(
-            audio_path   = f"assets/temp/{reddit_id}/audio.mp3",
-            reddit_id    = reddit_id,
-            skip_seconds = title_duration if settings.config["settings"]["captions"]["start_after_title"] else 0.0,
-        )
+    if caption_mode in ("whisper", "aligned") and storymode:
+        # nur Whisper braucht das zusammengefügte Audio als Datei – und auch nur, wenn es
+        # wirklich läuft (nicht bei einem Checkpoint-Treffer); "aligned" schreibt es erst im Fallback
+        audio_path   = f"assets/temp/{reddit_id}/audio.wav"
+        clip_paths   = [clip["path"] for clip in clips]
+
+        def write_audio() -> str:
+            concat_audio_files(clip_paths, audio_path)
+            return audio_path
+
+        skip_seconds = title_duration if settings.config["settings"]["captions"]["start_after_title"] else 0.0
+        if caption_mode == "aligned":
+            # bekannter TTS-Text wird auf die Clips aligned (gleiche Reihenfolge wie clip_names)
+            from utils.aligned_captions import generate_aligned_ass
+            make_ass = lambda: generate_aligned_ass(
+                audio_path, reddit_id=reddit_id, clip_names=clip_names, skip_seconds=skip_seconds
+            )
+            ass_out  = f"assets/temp/{reddit_id}/aligned_captions.ass"
+        else:
+            from utils.whisper_captions import generate_whisper_ass
+            make_ass = lambda: generate_whisper_ass(
+                audio_path=write_audio(), reddit_id=reddit_id, skip_seconds=skip_seconds
+            )
+            ass_out  = f"assets/temp/{reddit_id}/whisper_captions.ass"
+        # Whisper ist teuer → bei --resume nur neu, wenn Audio oder Caption-Settings sich geändert haben
+        with metrics.span(reddit_id, "captions", mode=caption_mode):
+            ass_path = Checkpoints(reddit_id).run(
+                "captions",
+                fingerprint(
+                    [file_fingerprint(path) for path in clip_paths],
+                    skip_seconds,
+                    settings.config["settings"]["captions"],
+                ),
+                make_ass,
+                outputs=[ass_out],
+            )
         # nur wenn Template gezogen wurde, legen wir vorher ein Overlay:
         if title_clip:
             background_clip = overlay_images_on_background(background_clip, [(title_clip, 0.0, title_duration)])
@@ -227,6 +274,7 @@ def make_final_video(
             color=settings.config["settings"]["captions"]["captions_color"],
             hlcolor=settings.config["settings"]["captions"]["captions_highlight_color"],
             gap=float(settings.config["settings"]["tts"].get("silence_duration", 0.0)),
+            durations=[manifest.duration(Path(jp).name[: -len(".mp3.json")]) for jp in json_paths],
             out_path=f"assets/temp/{reddit_id}/captions.ass",
         )
 
@@ -254,27 +302,21 @@ def make_final_video(
                     ffmpeg.input(f"assets/temp/{reddit_id}/png/story_content.png")["v"]
                     .filter("scale", screenshot_w, -1)
                 )
-                durations.append(
-                    float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/postaudio.mp3")["format"]["duration"])
-                )
+                durations.append(manifest.duration("postaudio"))
             else:
                 for i in range(number_of_clips + 1):
                     image_clips.append(
                         ffmpeg.input(f"assets/temp/{reddit_id}/png/img{i}.png")["v"]
                         .filter("scale", screenshot_w, -1)
                     )
-                    durations.append(
-                        float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/postaudio-{i}.mp3")["format"]["duration"])
-                    )
+                    durations.append(manifest.duration(f"postaudio-{i}"))
         else:          # Comment-Mode
             for i in range(number_of_clips):
                 img_clip = ffmpeg.input(f"assets/temp/{reddit_id}/png/comment_{i}.png")["v"].filter(
                     "scale", screenshot_w, -1
                 )
                 image_clips.append(img_clip)
-                durations.append(
-                    float(ffmpeg.probe(f"assets/temp/{reddit_id}/mp3/{i}.mp3")["format"]["duration"])
-                )
+                durations.append(manifest.duration(f"{i}"))
 
         # ► Zeitfenster + optional Opacity
         overlays = []
@@ -303,7 +345,7 @@ def make_final_video(
             background_clip,
             text      = wm_text,
             font      = family,        # <<< einzig relevanter Parameter
-            fontsize  = wm_size,
+            fontsize  = max(1, round(wm_size * ui_scale)),
             fontcolor = wm_color,
             x         = "(w-text_w)/2",
             y         = "h*0.41",
@@ -312,30 +354,31 @@ def make_final_video(
     
 
     # ─────────────────────────────────────────────────────────────────────────
-    # TEXT-WATERMARK   +   Skalierung
+    # TEXT-WATERMARK   +   Skalierung (nur ohne single pass, sonst schon passiert)
     # ─────────────────────────────────────────────────────────────────────────
-    background_clip = (
-        ffmpeg.drawtext(
-            background_clip,
-            text=f"Background by {background_config['video'][2]}",
-            x="(w-text_w)",
-            y="(h-text_h)",
-            fontsize=5,
-            fontcolor="White",
-            fontfile=os.path.join("fonts", "Roboto-Regular.ttf"),
-        )
-        .filter("scale", W, H)
+    background_clip = ffmpeg.drawtext(
+        background_clip,
+        text=f"Background by {background_config['video'][2]}",
+        x="(w-text_w)",
+        y="(h-text_h)",
+        fontsize=max(1, round(5 * ui_scale)),
+        fontcolor="White",
+        fontfile=os.path.join("fonts", "Roboto-Regular.ttf"),
     )
+    if not single_pass:
+        background_clip = background_clip.filter("scale", W, H)
 
     # ─────────────────────────────────────────────────────────────────────────
     # RENDERING
     # ─────────────────────────────────────────────────────────────────────────
     print_step("Rendering the video 🎥")
     from tqdm import tqdm
-    pbar = tqdm(total=100, desc="Progress: ", bar_format="{l_bar}{bar}", unit=" %")
+    pbar = tqdm(total=100, desc="Progress: ", bar_format="{l_bar}{bar} {postfix}", unit=" %")
 
-    def _upd(p: float) -> None:
-        pbar.update(round(p * 100, 2) - pbar.n)
+    def _upd(p: RenderProgress) -> None:
+        pbar.update(round(p.percent, 2) - pbar.n)
+        eta = f"{p.eta_s:.0f}s" if p.eta_s is not None else "?"
+        pbar.set_postfix_str(f"{p.fps:.0f} fps, {p.speed:.2f}x, ETA {eta}", refresh=False)
 
     subreddit   = settings.config["reddit"]["thread"]["subreddit"]
     results_dir = os.path.join("results", subreddit)
@@ -345,42 +388,43 @@ def make_final_video(
     file_name  = f"{safe_title}.mp4"
     main_path  = os.path.join(results_dir, file_name)
 
-    with ProgressFfmpeg(length, _upd) as prog:
+    # Encoder + Rate-Control aus [settings.encoding] (encoder_utils)
+    background_clip = hw_upload(background_clip)
+    encode_args = {
+        **video_output_args(length),
+        "b:a": audio_bitrate(),
+        "threads": multiprocessing.cpu_count(),
+    }
+
+    run_with_progress(
         ffmpeg.output(
             background_clip,
             final_audio,
             main_path,
             f="mp4",
-            **{
-                "c:v": "h264_videotoolbox",  # mac-HW-Encoder
-                "b:v": "20M",
-                "b:a": "192k",
-                "threads": multiprocessing.cpu_count(),
-            },
-        ).overwrite_output().global_args("-progress", prog.output_file.name).run(quiet=True)
+            **encode_args,
+        ).overwrite_output().global_args(*global_args()),
+        length,
+        _upd,
+        reddit_id=reddit_id,
+    )
 
     pbar.update(100 - pbar.n)
+    pbar.close()
 
     # ► Only-TTS (optional)
+    # Gleiche Bilder wie im Hauptvideo → Videospur per Stream-Copy übernehmen,
+    # nur die TTS-Spur wird neu gemuxt (kein zweites Rendern/Encoden).
     if allow_only_tts:
         only_dir = os.path.join(results_dir, "OnlyTTS")
         os.makedirs(only_dir, exist_ok=True)
-        with ProgressFfmpeg(length, _upd) as prog:
-            ffmpeg.output(
-                background_clip,
-                base_audio,
-                os.path.join(only_dir, file_name),
-                f="mp4",
-                **{
-                    "c:v": "h264_videotoolbox",
-                    "b:v": "20M",
-                    "b:a": "192k",
-                    "threads": multiprocessing.cpu_count(),
-                },
-            ).overwrite_output().global_args("-progress", prog.output_file.name).run(quiet=True)
-        pbar.update(100 - pbar.n)
-
-    pbar.close()
+        ffmpeg.output(
+            ffmpeg.input(main_path)["v"],
+            base_audio,
+            os.path.join(only_dir, file_name),
+            f="mp4",
+            **{"c:v": "copy", "b:a": audio_bitrate()},
+        ).overwrite_output().run(quiet=True)
 
     # ─────────────────────────────────────────────────────────────────────────
     # META + CLEANUP
@@ -401,3 +445,4 @@ def make_final_video(
     print_substep(f"Removed {cleanup(reddit_id)} temporary files 🗑")
     print_step("Done! 🎉 The video is in the results folder 📁")
     print_substep(f"Video path: {main_path}")
+    return main_path
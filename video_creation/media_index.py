@@ -0,0 +1,155 @@
+"""
+Persistent metadata index for the background library.
+
+Probing a multi-GB background with moviepy/ffprobe on every run is slow, so
+the results are stored in assets/backgrounds/index.json and reused as long as
+the file's mtime and size are unchanged.
+
+Each entry holds: duration, codec, width, height, fps, pix_fmt, profile,
+level, time_base and (for videos) the keyframe timestamps, which the
+background chopper uses to pick windows that can be cut by stream copy.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import ffmpeg
+
+INDEX_PATH = Path("assets/backgrounds/index.json")
+LIBRARY_DIRS = ("assets/backgrounds/video", "assets/backgrounds/audio")
+
+
+def _parse_rate(rate: str) -> float:
+    """'30000/1001' → 29.97"""
+    try:
+        num, _, den = rate.partition("/")
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def _probe_keyframes(path: str) -> List[float]:
+    """Reads keyframe timestamps from the packet headers (no decoding)."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags",
+            "-of", "csv=p=0",
+            path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            keyframes.append(round(float(pts), 6))
+    keyframes.sort()
+    return keyframes
+
+
+def probe_media(path: str) -> Dict:
+    """Probes a single file once and returns its index entry."""
+    info = ffmpeg.probe(path)
+    video = next((s for s in info["streams"] if s["codec_type"] == "video"), None)
+    audio = next((s for s in info["streams"] if s["codec_type"] == "audio"), None)
+    stream = video or audio or {}
+
+    entry = {
+        "duration": float(info["format"].get("duration") or stream.get("duration") or 0.0),
+        "codec": stream.get("codec_name", ""),
+        "width": int(video["width"]) if video else 0,
+        "height": int(video["height"]) if video else 0,
+        "fps": _parse_rate(video.get("avg_frame_rate", "0/1")) if video else 0.0,
+        "pix_fmt": video.get("pix_fmt", "") if video else "",
+        "profile": video.get("profile", "") if video else "",
+        "level": int(video.get("level", 0) or 0) if video else 0,
+        "time_base": video.get("time_base", "") if video else "",
+        "sample_rate": int(audio["sample_rate"]) if audio else 0,
+        "keyframes": _probe_keyframes(path) if video else [],
+    }
+    return entry
+
+
+class MediaIndex:
+    """mtime/size-invalidated cache of probe_media results."""
+
+    def __init__(self, index_path: Path = INDEX_PATH):
+        self.index_path = Path(index_path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+        self._loaded = True
+
+    def _save(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.index_path)
+
+    def get(self, path: str) -> Dict:
+        """Returns the metadata of *path*, probing it only if it changed since the last run."""
+        key = Path(path).as_posix()
+        stat = os.stat(path)
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            # Einträge ohne "profile" stammen von einer älteren Version → neu proben
+            if (
+                entry
+                and entry["mtime"] == stat.st_mtime
+                and entry["size"] == stat.st_size
+                and "profile" in entry
+            ):
+                return entry
+
+            entry = probe_media(path)
+            entry.update(mtime=stat.st_mtime, size=stat.st_size)
+            self._entries[key] = entry
+            self._save()
+            return entry
+
+    def refresh(self, directories=LIBRARY_DIRS) -> None:
+        """Indexes every file of the background library and drops deleted ones."""
+        seen = set()
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    self.get(path)
+                    seen.add(Path(path).as_posix())
+        with self._lock:
+            stale = [k for k in self._entries if k not in seen]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._save()
+
+    def duration(self, path: str) -> float:
+        return self.get(path)["duration"]
+
+    def keyframes(self, path: str) -> Optional[List[float]]:
+        return self.get(path)["keyframes"] or None
+
+
+media_index = MediaIndex()
@@ -1,41 +1,223 @@
-import threading, tempfile, time
-
-class ProgressFfmpeg(threading.Thread):
-    def __init__(self, vid_duration_seconds, progress_update_callback):
-        threading.Thread.__init__(self, name="ProgressFfmpeg")
-        self.stop_event = threading.Event()
-        self.output_file = tempfile.NamedTemporaryFile(mode="w+", delete=False)
-        self.vid_duration_seconds = vid_duration_seconds
-        self.progress_update_callback = progress_update_callback
-
-    def run(self):
-        while not self.stop_event.is_set():
-            latest_progress = self.get_latest_ms_progress()
-            if latest_progress is not None:
-                completed_percent = latest_progress / self.vid_duration_seconds
-                self.progress_update_callback(completed_percent)
-            time.sleep(1)
-
-    def get_latest_ms_progress(self):
-        lines = self.output_file.readlines()
-
-        if lines:
-            for line in lines:
-                if "out_time_ms" in line:
-                    out_time_ms_str = line.split("=")[1].strip()
-                    if out_time_ms_str.isnumeric():
-                        return float(out_time_ms_str) / 1000000.0
-                    else:
-                        # Handle the case when "N/A" is encountered
-                        return None
-        return None
-
-    def stop(self):
-        self.stop_event.set()
-
-    def __enter__(self):
-        self.start()
-        return self
-
-    def __exit__(self, *args, **kwargs):
-        self.stop()
\ No newline at end of file
+"""
+Live render telemetry from ffmpeg's -progress output.
+
+run_with_progress() starts ffmpeg with `-progress pipe:1` and parses the
+key=value blocks from its stdout as they arrive (no temp file, no polling).
+Every block becomes a RenderProgress – position, fps, speed, bitrate,
+dropped/duplicated frames and ETA – which is passed to the callback and
+published to all subscribe()rs in this process. The latest state of every
+running render is also kept in video_creation/data/render_progress/<id>.json
+(one file per render, so parallel main.py processes don't overwrite each
+other), and the GUI (a separate process) can stream it to the browser.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import ffmpeg
+
+STATUS_DIR = "./video_creation/data/render_progress"
+STATUS_TTL = 3600  # seconds a finished render stays in the status
+STATUS_INTERVAL = 1.0  # seconds between status file writes per render
+
+_subscribers: List[queue.Queue] = []
+_subscribers_lock = threading.Lock()
+
+
+@dataclass
+class RenderProgress:
+    reddit_id: str
+    duration_s: float
+    out_time_s: float = 0.0
+    frame: int = 0
+    fps: float = 0.0
+    speed: float = 0.0  # Vielfaches von Echtzeit (0.3 = 0.3x)
+    bitrate_kbps: float = 0.0
+    dup_frames: int = 0
+    drop_frames: int = 0
+    eta_s: Optional[float] = None
+    done: bool = False
+    time: float = 0.0
+
+    @property
+    def percent(self) -> float:
+        if self.done:
+            return 100.0
+        return min(100.0, 100.0 * self.out_time_s / self.duration_s) if self.duration_s else 0.0
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "percent": round(self.percent, 2)}
+
+
+# ═══════════════════ Pub/Sub ════════════════════════════════════════════════════
+def subscribe(maxsize: int = 100) -> queue.Queue:
+    """Queue receiving every RenderProgress of this process. Slow readers lose the oldest events."""
+    q: queue.Queue = queue.Queue(maxsize=maxsize)
+    with _subscribers_lock:
+        _subscribers.append(q)
+    return q
+
+
+def unsubscribe(q: queue.Queue) -> None:
+    with _subscribers_lock:
+        if q in _subscribers:
+            _subscribers.remove(q)
+
+
+def publish(progress: RenderProgress) -> None:
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for q in subscribers:
+        while True:
+            try:
+                q.put_nowait(progress)
+                break
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+def read_status() -> Dict[str, Dict]:
+    """Latest progress of every render (written by the rendering processes), by thread id."""
+    status: Dict[str, Dict] = {}
+    try:
+        names = os.listdir(STATUS_DIR)
+    except FileNotFoundError:
+        return status
+    for name in sorted(names):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(STATUS_DIR, name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                progress = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        # fertige Renders nach STATUS_TTL vergessen, damit das Verzeichnis nicht wächst
+        if progress.get("done") and progress.get("time", 0) < time.time() - STATUS_TTL:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        status[name[: -len(".json")]] = progress
+    return status
+
+
+def _write_status(reddit_id: str, progress: Optional[RenderProgress]) -> None:
+    """Stores the latest progress of a render (None: removes it, e.g. after a failure)."""
+    path = os.path.join(STATUS_DIR, f"{reddit_id}.json")
+    if progress is None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return
+    os.makedirs(STATUS_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(progress.to_dict(), f)
+    os.replace(tmp, path)
+
+
+# ═══════════════════ Parser ═════════════════════════════════════════════════════
+def _number(value: Optional[str]) -> float:
+    """'1234.5kbits/s', '0.98x', '29.97', 'N/A' → float (0 if unknown)."""
+    match = re.match(r"\s*([-+]?\d+(?:\.\d+)?)", value or "")
+    return float(match.group(1)) if match else 0.0
+
+
+def parse_blocks(lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """Groups ffmpeg's -progress lines into one dict per report (ends with progress=continue|end)."""
+    block: Dict[str, str] = {}
+    for line in lines:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        block[key] = value
+        if key == "progress":
+            yield block
+            block = {}
+
+
+def to_progress(block: Dict[str, str], reddit_id: str, duration: float) -> RenderProgress:
+    # out_time_us ist ab ffmpeg 4.4 da; out_time_ms enthält (trotz Name) ebenfalls Mikrosekunden
+    out_time = _number(block.get("out_time_us") or block.get("out_time_ms")) / 1_000_000
+    speed = _number(block.get("speed"))
+    progress = RenderProgress(
+        reddit_id=reddit_id,
+        duration_s=duration,
+        out_time_s=max(0.0, out_time),
+        frame=int(_number(block.get("frame"))),
+        fps=_number(block.get("fps")),
+        speed=speed,
+        bitrate_kbps=_number(block.get("bitrate")),
+        dup_frames=int(_number(block.get("dup_frames"))),
+        drop_frames=int(_number(block.get("drop_frames"))),
+        done=block.get("progress") == "end",
+        time=time.time(),
+    )
+    if progress.done:
+        progress.eta_s = 0.0
+    elif speed > 0:
+        progress.eta_s = max(0.0, (duration - progress.out_time_s) / speed)
+    return progress
+
+
+# ═══════════════════ Runner ═════════════════════════════════════════════════════
+def run_with_progress(
+    stream_spec,
+    duration: float,
+    callback: Optional[Callable[[RenderProgress], None]] = None,
+    *,
+    reddit_id: str = "",
+) -> None:
+    """Runs an ffmpeg-python output spec and reports its progress while it encodes.
+
+    Raises ffmpeg.Error (with the captured stderr) like .run(quiet=True) did.
+    """
+    process = stream_spec.global_args("-progress", "pipe:1", "-nostats").run_async(
+        pipe_stdout=True, pipe_stderr=True
+    )
+    # stderr parallel leeren – sonst blockiert ffmpeg, sobald die Pipe voll ist
+    stderr_chunks: List[bytes] = []
+    drain = threading.Thread(
+        target=lambda: stderr_chunks.extend(iter(lambda: process.stderr.read(65536), b"")),
+        name="ffmpeg-stderr",
+        daemon=True,
+    )
+    drain.start()
+
+    last_status = 0.0
+    lines = (raw.decode("utf-8", "replace") for raw in process.stdout)
+    try:
+        for block in parse_blocks(lines):
+            progress = to_progress(block, reddit_id, duration)
+            if callback:
+                callback(progress)
+            publish(progress)
+            if reddit_id and (progress.done or progress.time - last_status >= STATUS_INTERVAL):
+                _write_status(reddit_id, progress)
+                last_status = progress.time
+    except BaseException:  # z. B. Ctrl+C – ffmpeg nicht weiterlaufen lassen
+        process.kill()
+        process.wait()
+        if reddit_id:
+            _write_status(reddit_id, None)
+        raise
+
+    process.wait()
+    drain.join()
+    if process.returncode != 0:
+        if reddit_id:
+            _write_status(reddit_id, None)
+        raise ffmpeg.Error("ffmpeg", b"", b"".join(stderr_chunks))
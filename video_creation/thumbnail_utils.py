@@ -1,11 +1,10 @@
 import textwrap
 import os
 
-from PIL import ImageFont
 from pilmoji import Pilmoji
-import matplotlib.font_manager as fm
 
-from utils.fonts import getsize, getheight
+from utils.emoji_source import emoji_source
+from utils.fonts import ROBOTO_BOLD, STYLE_TO_WEIGHT, get_font, getsize, getheight, resolve_system_font
 from utils.console import print_step
 from utils import settings
 
@@ -37,87 +36,9 @@ def create_fancy_thumbnail(
     • Kanalname wird unten links gerendert
     """
     # ─────────────────────────────────────────── System‑/Fallback‑Font
-    try:
-        # Try original font name first
-        font_path = fm.findfont(
-            fm.FontProperties(family=font_family),
-            fallback_to_default=False,
-        )
-        base_font = ImageFont.truetype(font_path, font_size)
-    except Exception:
-        font_loaded = False
-        
-        # If that fails and font contains hyphen or space, try different approaches
-        if "-" in font_family or " " in font_family:
-            # Try both hyphen and space as separators
-            if "-" in font_family:
-                parts = font_family.split("-")
-            else:
-                parts = font_family.split(" ")
-            font_name = parts[0]
-            style = parts[1] if len(parts) > 1 else "Regular"
-            
-            # Try with space instead of hyphen
-            try:
-                font_family_alt = font_family.replace("-", " ")
-                font_path = fm.findfont(
-                    fm.FontProperties(family=font_family_alt),
-                    fallback_to_default=False,
-                )
-                base_font = ImageFont.truetype(font_path, font_size)
-                font_loaded = True
-            except Exception:
-                pass
-            
-            # Try with font family and weight/style properties
-            if not font_loaded:
-                try:
-                    weight_map = {
-                        "Bold": "bold", "SemiBold": "semibold", "Medium": "medium",
-                        "Light": "light", "Thin": "ultralight", "Black": "black",
-                        "ExtraBold": "heavy", "ExtraLight": "ultralight",
-                        "Regular": "normal"
-                    }
-                    style_map = {
-                        "Italic": "italic", "Oblique": "oblique"
-                    }
-                    
-                    font_props = fm.FontProperties(family=font_name)
-                    if style in weight_map:
-                        font_props.set_weight(weight_map[style])
-                    if style in style_map:
-                        font_props.set_style(style_map[style])
-                    
-                    font_path = fm.findfont(font_props, fallback_to_default=False)
-                    
-                    # For variable fonts, we need to specify the weight differently
-                    base_font = ImageFont.truetype(font_path, font_size)
-                    
-                    # Try to set weight for variable fonts
-                    try:
-                        # Convert style to font variation weight (100-900 scale)
-                        style_to_weight = {
-                            "Thin": 100, "ExtraLight": 200, "Light": 300, "Regular": 400,
-                            "Medium": 500, "SemiBold": 600, "Bold": 700, "ExtraBold": 800, "Black": 900
-                        }
-                        
-                        if style in style_to_weight and hasattr(base_font, 'set_variation_by_axes'):
-                            weight_value = style_to_weight[style]
-                            base_font.set_variation_by_axes([weight_value])
-                    except Exception:
-                        # If variation setting fails, continue with regular font
-                        pass
-                    
-                    font_loaded = True
-                except Exception:
-                    pass
-        
-        if not font_loaded:
-            print_step(
-                f"[yellow]Could not load system font \"{font_family}\" - falling back to Roboto.[/yellow]"
-            )
-            font_path = os.path.join("fonts", "Roboto-Bold.ttf")
-            base_font = ImageFont.truetype(font_path, font_size)
+    # Pfad + Gewicht werden pro Familie nur einmal aufgelöst (utils.fonts)
+    font_path, weight = resolve_system_font(font_family)
+    base_font = get_font(font_path, font_size, weight)
 
     print_step(f"Creating fancy thumbnail for: {text}")
 
@@ -126,33 +47,11 @@ def create_fancy_thumbnail(
     # ─────────────────────────────────────────── Text umbrechen & evtl. verkleinern
     available_w = img_w - left_margin - right_margin
     
-    # Helper function to create font with correct weight
-    def create_font_with_weight(path, size):
-        new_font = ImageFont.truetype(path, size)
-        # Reapply variable font weight for fonts that were loaded with weight settings
-        if hasattr(base_font, '_variation_axes') or 'ExtraBold' in font_family or 'Bold' in font_family:
-            try:
-                # Extract style from font_family for weight setting
-                if ' ' in font_family:
-                    parts = font_family.split(' ')
-                    style = parts[-1] if len(parts) > 1 else 'Regular'
-                elif '-' in font_family:
-                    parts = font_family.split('-')
-                    style = parts[-1] if len(parts) > 1 else 'Regular'
-                else:
-                    style = 'Regular'
-                
-                style_to_weight = {
-                    "Thin": 100, "ExtraLight": 200, "Light": 300, "Regular": 400,
-                    "Medium": 500, "SemiBold": 600, "Bold": 700, "ExtraBold": 800, "Black": 900
-                }
-                
-                if style in style_to_weight and hasattr(new_font, 'set_variation_by_axes'):
-                    weight_value = style_to_weight[style]
-                    new_font.set_variation_by_axes([weight_value])
-            except:
-                pass
-        return new_font
+    # Weight for the shrunk sizes: the style suffix of Bold families
+    shrink_weight = None
+    if "Bold" in font_family:
+        sep = " " if " " in font_family else "-"
+        shrink_weight = STYLE_TO_WEIGHT.get(font_family.split(sep)[-1])
 
     # Use reasonable line wrapping for good readability
     lines = textwrap.wrap(text, width=wrap)
@@ -165,7 +64,7 @@ def create_fancy_thumbnail(
     # Only reduce font size if absolutely necessary
     while current_size > min_font_size and max_line_w(font) > available_w:
         current_size -= 1
-        font = create_font_with_weight(font_path, current_size)
+        font = get_font(font_path, current_size, shrink_weight)
 
     # ─────────────────────────────────────────── Vertikal positionieren
     total_h = sum(getheight(font, ln) for ln in lines) + padding * (len(lines) - 1)
@@ -173,18 +72,18 @@ def create_fancy_thumbnail(
 
     # ─────────────────────────────────────────── Kanalname‑Font
     try:
-        channel_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), 30)
+        channel_font = get_font(ROBOTO_BOLD, 30)
     except Exception:
         channel_font = font  # worst‑case fallback
 
     # ─────────────────────────────────────────── Reddit Metrics Font
     try:
-        metrics_font = ImageFont.truetype(os.path.join("fonts", "Roboto-Bold.ttf"), 24)
+        metrics_font = get_font(ROBOTO_BOLD, 24)
     except Exception:
         metrics_font = channel_font  # fallback
 
     # ─────────────────────────────────────────── Zeichnen (Pilmoji rendert Emojis farbig)
-    with Pilmoji(image) as p:
+    with Pilmoji(image, source=emoji_source()) as p:
         # Kanalname (Koordinaten int‑sicher)
         _draw_pilmoji_text(
             p,